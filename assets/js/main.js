@@ -1110,14 +1110,27 @@ async function sendChatMessage() {
     const typingId = showTypingIndicator();
     
     try {
-        // Call OpenAI API with selected language
-        const response = await getChatbotResponse(message, currentChatLanguage);
+        // Stream the answer, rendering each chunk as it arrives
+        let botMessage = null;
+        let text = '';
         
-        // Remove typing indicator
-        removeTypingIndicator(typingId);
+        const streamed = await streamChatbotResponse(message, currentChatLanguage, (delta) => {
+            text += delta;
+            if (!botMessage) {
+                // Replace the typing indicator on the first chunk
+                removeTypingIndicator(typingId);
+                botMessage = addChatMessage(text, 'bot');
+            } else {
+                updateChatMessage(botMessage, text);
+            }
+        });
         
-        // Add bot response
-        addChatMessage(response, 'bot');
+        if (!streamed) {
+            // Streaming unavailable: fall back to the single-response endpoint
+            const response = await getChatbotResponse(message, currentChatLanguage);
+            removeTypingIndicator(typingId);
+            addChatMessage(response, 'bot');
+        }
         
     } catch (error) {
         console.error('Chatbot error:', error);
@@ -1163,6 +1176,19 @@ function addChatMessage(text, sender) {
     
     // Scroll to bottom
     chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
+    
+    return messageDiv;
+}
+
+/**
+ * Replace the text of a message added by addChatMessage
+ */
+function updateChatMessage(messageDiv, text) {
+    const chatbotMessages = document.getElementById('chatbotMessages');
+    
+    messageDiv.querySelector('.message-content p').innerHTML = text.replace(/\n/g, '<br>');
+    
+    chatbotMessages.scrollTop = chatbotMessages.scrollHeight;
 }
 
 /**
@@ -1242,6 +1268,78 @@ async function getChatbotResponse(userMessage, language = 'en') {
     }
 }
 
+/**
+ * Stream a chatbot response from the SSE endpoint
+ *
+ * Calls onDelta(text) for every chunk. Resolves to true once the stream
+ * finished, or false if nothing was received (so the caller can fall back).
+ * Throws if the stream breaks after text was shown.
+ */
+async function streamChatbotResponse(userMessage, language, onDelta) {
+    const CHAT_STREAM_URL = '/api/chat/stream';
+    let received = false;
+    
+    try {
+        const response = await fetch(CHAT_STREAM_URL, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+                'Accept': 'text/event-stream',
+                'Cache-Control': 'no-cache'
+            },
+            body: JSON.stringify({
+                message: userMessage,
+                language: language
+            })
+        });
+        
+        if (!response.ok || !response.body) {
+            throw new Error(`Chat stream error: ${response.status}`);
+        }
+        
+        const reader = response.body.getReader();
+        const decoder = new TextDecoder();
+        let buffer = '';
+        
+        while (true) {
+            const { value, done } = await reader.read();
+            if (done) break;
+            
+            buffer += decoder.decode(value, { stream: true });
+            
+            // Events are separated by a blank line
+            let boundary;
+            while ((boundary = buffer.indexOf('\n\n')) !== -1) {
+                const rawEvent = buffer.slice(0, boundary);
+                buffer = buffer.slice(boundary + 2);
+                
+                let eventName = 'message';
+                let data = '';
+                rawEvent.split('\n').forEach(line => {
+                    if (line.startsWith('event:')) eventName = line.slice(6).trim();
+                    else if (line.startsWith('data:')) data += line.slice(5).trim();
+                });
+                
+                if (eventName === 'done') return true;
+                if (eventName === 'error') throw new Error('Chat stream interrupted');
+                
+                const payload = JSON.parse(data);
+                if (payload.delta) {
+                    received = true;
+                    onDelta(payload.delta);
+                }
+            }
+        }
+        
+        return received;
+        
+    } catch (error) {
+        console.error('Chat stream error:', error);
+        if (received) throw error;
+        return false;
+    }
+}
+
 /**
  * Fallback responses when OpenAI API is not available
  */
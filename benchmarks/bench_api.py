@@ -0,0 +1,295 @@
+"""
+FieldScore AI - End-to-End API Benchmark
+Drives the FastAPI app in-process (ASGI transport) and through a real uvicorn
+worker, and reports throughput and p50/p95/p99 latency for:
+
+    /predict             single farm
+    /predict/batch       batch sizes 1 to 10,000
+    /chat                against the local OpenAI stub
+
+Each /predict scenario runs with a trained model and with the rule-based
+fallback. The model is a small XGBoost regressor trained on synthetic farms
+and published to a temporary registry, so the benchmark does not depend on
+models/. The prediction cache is off unless --prediction-cache is given, so
+every request is scored.
+
+Run from the project root: python benchmarks/bench_api.py
+Results go to benchmarks/results/api_<commit>.json; pass --compare with an
+earlier file to print the change per scenario.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+import joblib
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.load_test_chat_isolation import free_port, start_server, wait_ready
+
+BATCH_SIZES = [1, 10, 100, 1000, 10000]
+MODES = ["model", "fallback"]
+TRANSPORTS = ["asgi", "uvicorn"]
+CROPS = ["maize", "rice", "coffee", "wheat", "beans", "cassava", "tea", "banana", "sorghum", "cotton", "potato"]
+JSON_HEADERS = {"content-type": "application/json"}
+
+def random_farms(n: int, seed: int = 42) -> list:
+    """n distinct, valid FarmInput payloads"""
+    rng = np.random.default_rng(seed)
+    columns = {
+        "latitude": rng.uniform(-4, 4, n),
+        "longitude": rng.uniform(30, 40, n),
+        "farm_area_hectares": rng.uniform(0.5, 10, n),
+        "ndvi_mean_12mo": rng.uniform(0.2, 0.95, n),
+        "ndvi_slope": rng.uniform(-0.05, 0.05, n),
+        "ndvi_14day_delta": rng.uniform(-0.15, 0.15, n),
+        "ndvi_anomaly_zscore": rng.uniform(-4, 4, n),
+        "rainfall_deficit_30day": rng.uniform(0, 120, n),
+        "coefficient_of_variation": rng.uniform(0, 1, n),
+        "soil_organic_carbon": rng.uniform(0, 5, n),
+        "loan_amount_usd": rng.uniform(100, 10000, n),
+    }
+    crops = rng.integers(0, len(CROPS), n)
+    return [
+        {"crop_type": CROPS[crops[i]], **{name: round(float(values[i]), 4) for name, values in columns.items()}}
+        for i in range(n)
+    ]
+
+def publish_synthetic_model(api, registry_dir: str, n_farms: int = 20000, n_estimators: int = 100,
+                            max_depth: int = 6) -> str:
+    """
+    Train an XGBoost regressor on rule-based scores of synthetic farms and
+    publish it as the active version of registry_dir
+    """
+    import xgboost as xgb
+    from model_registry import publish
+    from scoring import rule_based_prediction_batch
+
+    X = api.FEATURE_SCHEMA.encode([api.FarmInput(**farm) for farm in random_farms(n_farms, seed=7)])
+    y = rule_based_prediction_batch(X)[0] + np.random.default_rng(7).normal(0, 3, len(X))
+    # Same shape of model as train_model.py produces by default
+    model = xgb.XGBRegressor(n_estimators=n_estimators, max_depth=max_depth, learning_rate=0.1, subsample=0.8,
+                             colsample_bytree=0.8, random_state=42)
+    model.fit(X, y)
+    model_path = os.path.join(os.path.dirname(registry_dir), "bench_model.pkl")
+    joblib.dump(model, model_path)
+    return publish(model_path, registry_dir, version="bench")
+
+def use_registry(registry, registry_dir: str):
+    """Serve the in-process app from registry_dir; an empty one means rule-based scoring"""
+    registry.registry_dir = registry_dir
+    registry.active = None
+    registry.activate()
+
+async def measure(client: httpx.AsyncClient, path: str, bodies: list, n_requests: int,
+                  concurrency: int) -> tuple:
+    """
+    POST n_requests pre-encoded bodies (cycling through them) with fixed concurrency
+
+    Returns:
+        tuple: (per-request latency in ms, wall time in seconds, failed requests)
+    """
+    latencies = []
+    failed = 0
+    next_request = 0
+
+    async def worker():
+        nonlocal next_request, failed
+        while next_request < n_requests:
+            body = bodies[next_request % len(bodies)]
+            next_request += 1
+            start = time.perf_counter()
+            response = await client.post(path, content=body, headers=JSON_HEADERS)
+            latencies.append((time.perf_counter() - start) * 1000)
+            if response.status_code != 200:
+                failed += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, n_requests))))
+    return np.array(latencies), time.perf_counter() - start, failed
+
+def summarize(scenario: dict, latencies: np.ndarray, seconds: float, failed: int) -> dict:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    result = {
+        **scenario,
+        "requests": len(latencies),
+        "failed": failed,
+        "seconds": round(seconds, 3),
+        "requests_per_s": round(len(latencies) / seconds, 1),
+        "farms_per_s": round(len(latencies) * scenario["batch_size"] / seconds, 1),
+        "p50_ms": round(float(p50), 3),
+        "p95_ms": round(float(p95), 3),
+        "p99_ms": round(float(p99), 3)
+    }
+    label = f"{result['transport']:<8} {result['mode']:<9} {result['endpoint']:<15} {result['batch_size']:>6}"
+    print(f"{label} {result['requests']:>6} {result['requests_per_s']:>9.1f} {result['farms_per_s']:>10.1f} "
+          f"{result['p50_ms']:>9.2f} {result['p95_ms']:>9.2f} {result['p99_ms']:>9.2f}"
+          + (f"  ({failed} failed)" if failed else ""))
+    return result
+
+async def run_predict_scenarios(client, transport: str, mode: str, farms: list, args) -> list:
+    results = []
+    single = [json.dumps(farm).encode() for farm in farms[:1000]]
+    await measure(client, "/predict", single, args.warmup, args.concurrency)
+    latencies, seconds, failed = await measure(client, "/predict", single, args.requests, args.concurrency)
+    results.append(summarize({"transport": transport, "mode": mode, "endpoint": "/predict", "batch_size": 1},
+                             latencies, seconds, failed))
+
+    for size in args.batch_sizes:
+        bodies = [json.dumps(farms[i:i + size]).encode() for i in range(0, len(farms) - size + 1, size)][:100]
+        n_requests = max(args.min_batch_requests, args.requests // size)
+        await measure(client, "/predict/batch", bodies, min(args.warmup, n_requests), args.concurrency)
+        latencies, seconds, failed = await measure(client, "/predict/batch", bodies, n_requests, args.concurrency)
+        results.append(summarize({"transport": transport, "mode": mode, "endpoint": "/predict/batch",
+                                  "batch_size": size}, latencies, seconds, failed))
+    return results
+
+async def run_chat_scenario(client, transport: str, args) -> dict:
+    # Distinct messages, so every call goes upstream instead of the chat cache
+    bodies = [json.dumps({"message": f"How is the risk score calculated? #{transport}-{i}",
+                          "language": "en"}).encode() for i in range(args.chat_requests)]
+    latencies, seconds, failed = await measure(client, "/chat", bodies, args.chat_requests, args.concurrency)
+    return summarize({"transport": transport, "mode": "stub", "endpoint": "/chat", "batch_size": 0},
+                     latencies, seconds, failed)
+
+async def run(args, api, registries: dict, env: dict) -> list:
+    farms = random_farms(max(max(args.batch_sizes), 1000))
+    print(f"{'transport':<8} {'mode':<9} {'endpoint':<15} {'batch':>6} {'reqs':>6} {'req/s':>9} {'farms/s':>10} "
+          f"{'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    results = []
+    if "asgi" in args.transports:
+        transport = httpx.ASGITransport(app=api.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+            for mode in args.modes:
+                use_registry(api.registry, registries[mode])
+                results += await run_predict_scenarios(client, "asgi", mode, farms, args)
+            if args.chat_requests:
+                results.append(await run_chat_scenario(client, "asgi", args))
+
+    if "uvicorn" in args.transports:
+        limits = httpx.Limits(max_connections=args.concurrency + 10)
+        for i, mode in enumerate(args.modes):
+            port = free_port()
+            server = start_server("api:app", port, {**env, "MODEL_REGISTRY_DIR": registries[mode]}, cwd=args.workdir)
+            try:
+                await wait_ready(f"http://127.0.0.1:{port}/")
+                async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", limits=limits,
+                                             timeout=300) as client:
+                    results += await run_predict_scenarios(client, "uvicorn", mode, farms, args)
+                    if args.chat_requests and i == 0:
+                        results.append(await run_chat_scenario(client, "uvicorn", args))
+            finally:
+                server.terminate()
+                server.wait()
+    return results
+
+def git_commit() -> dict:
+    def git(*command):
+        return subprocess.run(["git", *command], cwd=ROOT, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or "unknown",
+                "dirty": bool(git("status", "--porcelain", "--untracked-files=no"))}
+    except OSError:
+        return {"commit": "unknown", "dirty": None}
+
+def result_key(result: dict) -> tuple:
+    return (result["transport"], result["mode"], result["endpoint"], result["batch_size"])
+
+def compare(baseline_path: str, results: list):
+    """Print the change in throughput and latency against an earlier results file"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)
+    previous = {result_key(r): r for r in baseline["results"]}
+    print(f"\nChange vs {baseline['meta']['commit']} ({baseline_path}); latency: negative is faster")
+    print(f"{'transport':<8} {'mode':<9} {'endpoint':<15} {'batch':>6} {'req/s':>9} {'p50':>9} {'p95':>9} {'p99':>9}")
+    for result in results:
+        old = previous.get(result_key(result))
+        if old is None:
+            continue
+        changes = [f"{(result[name] / old[name] - 1) * 100:+8.1f}%" if old[name] else f"{'-':>9}"
+                   for name in ("requests_per_s", "p50_ms", "p95_ms", "p99_ms")]
+        print(f"{result['transport']:<8} {result['mode']:<9} {result['endpoint']:<15} "
+              f"{result['batch_size']:>6} {' '.join(changes)}")
+
+def main(args) -> int:
+    args.output = os.path.abspath(args.output) if args.output else None
+    args.compare = os.path.abspath(args.compare) if args.compare else None
+    args.workdir = tempfile.mkdtemp(prefix="fieldscore-bench-")
+    registries = {"fallback": os.path.join(args.workdir, "registry-empty"),
+                  "model": os.path.join(args.workdir, "registry-model")}
+    os.makedirs(registries["fallback"])
+
+    stub_port = free_port()
+    stub = start_server("benchmarks.stub_openai:app", stub_port, {"STUB_LATENCY_S": str(args.upstream_latency)})
+    env = {
+        "PYTHONPATH": ROOT,
+        "MODEL_REGISTRY_DIR": registries["fallback"],
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+    }
+    if not args.prediction_cache:
+        env["PREDICTION_CACHE_SIZE"] = "0"
+    # The app reads its configuration at import; run it from an empty directory
+    # so a models/ artifact in the checkout is never picked up
+    os.environ.update(env)
+    os.chdir(args.workdir)
+    try:
+        asyncio.run(wait_ready(f"http://127.0.0.1:{stub_port}/stats"))
+        import api
+
+        publish_synthetic_model(api, registries["model"])
+        print("FieldScore AI - End-to-End API Benchmark\n")
+        results = asyncio.run(run(args, api, registries, env))
+    finally:
+        stub.terminate()
+        stub.wait()
+        os.chdir(ROOT)
+
+    report = {
+        "meta": {
+            **git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "args": {k: v for k, v in vars(args).items() if k not in ("workdir", "output", "compare")}
+        },
+        "results": results
+    }
+    output = args.output or os.path.join(ROOT, "benchmarks", "results", f"api_{report['meta']['commit']}.json")
+    os.makedirs(os.path.dirname(output), exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to: {output}")
+
+    if args.compare:
+        compare(args.compare, results)
+    return 1 if any(r["failed"] for r in results) else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--transports", nargs="+", choices=TRANSPORTS, default=TRANSPORTS)
+    parser.add_argument("--modes", nargs="+", choices=MODES, default=MODES)
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--requests", type=int, default=2000,
+                        help="Requests per /predict scenario; batches send requests / batch size")
+    parser.add_argument("--min-batch-requests", type=int, default=10)
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--chat-requests", type=int, default=200, help="0 skips /chat")
+    parser.add_argument("--upstream-latency", type=float, default=0.05, help="Stub completion time (s)")
+    parser.add_argument("--prediction-cache", action="store_true", help="Leave the prediction cache enabled")
+    parser.add_argument("--output", help="Results JSON (default: benchmarks/results/api_<commit>.json)")
+    parser.add_argument("--compare", metavar="RESULTS_JSON", help="Earlier results to compare against")
+    sys.exit(main(parser.parse_args()))
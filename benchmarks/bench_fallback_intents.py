@@ -0,0 +1,130 @@
+"""
+FieldScore AI - Fallback Intent Matcher Benchmark
+Checks chatbot.get_fallback_response against the previous implementation and
+a single combined regex, and times all three on typical chat messages and long
+adversarial inputs
+
+Run from the project root: python benchmarks/bench_fallback_intents.py
+"""
+
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from chatbot import FALLBACK_RESPONSES, INTENT_KEYWORDS, get_fallback_response, match_intent
+
+def legacy_fallback_response(message: str, language: str = "en") -> str:
+    """The original implementation: one any() substring scan per intent, in order"""
+    message_lower = message.lower()
+    # The nested response dict literal was rebuilt on every call
+    responses = {lang: dict(answers) for lang, answers in FALLBACK_RESPONSES.items()}
+    lang_responses = responses.get(language, responses["en"])
+    for intent, words in INTENT_KEYWORDS:
+        if any(word in message_lower for word in words):
+            return lang_responses[intent]
+    return lang_responses["default"]
+
+def compile_intent_regex(intent_keywords) -> re.Pattern:
+    """
+    Single-pass alternative: one capture group per intent inside a lookahead
+
+    The lookahead tries every position (overlapping keywords are not skipped)
+    and groups are in priority order, so the lowest lastindex over all matches
+    is the winning intent.
+    """
+    groups = "|".join("(" + "|".join(map(re.escape, words)) + ")" for _, words in intent_keywords)
+    return re.compile(f"(?=(?:{groups}))")
+
+INTENT_REGEX = compile_intent_regex(INTENT_KEYWORDS)
+INTENT_NAMES = [intent for intent, _ in INTENT_KEYWORDS]
+
+def regex_fallback_response(message: str, language: str = "en") -> str:
+    best = len(INTENT_NAMES)
+    for match in INTENT_REGEX.finditer(message.lower()):
+        best = min(best, match.lastindex - 1)
+        if best == 0:
+            break
+    intent = INTENT_NAMES[best] if best < len(INTENT_NAMES) else "default"
+    return FALLBACK_RESPONSES.get(language, FALLBACK_RESPONSES["en"])[intent]
+
+TYPICAL_MESSAGES = [
+    "Hello!",
+    "What is NDVI?",
+    "How does the risk scoring work?",
+    "Can I try the demo?",
+    "Сколько это стоит? Какая цена?",
+    "Narx qanday?",
+    "Is the model reliable and accurate enough for our loan book?",
+    "Tell me about your company",
+]
+
+def adversarial_messages(length: int) -> dict:
+    """Long inputs that never match, or only match at the very end"""
+    near_misses = "hel ndv sco wor dem cos accura приве спутни стоимост "
+    return {
+        "no keyword (filler)": "z" * length,
+        "near misses": (near_misses * (length // len(near_misses) + 1))[:length],
+        "mixed case + match at end": ("QwErTy " * (length // 7 + 1))[:length] + " ACCURACY",
+        "cyrillic + match at end": ("жжжж " * (length // 5 + 1))[:length] + " точность",
+    }
+
+def random_message(rng: random.Random) -> str:
+    """Random text mixing keyword fragments, so keywords overlap and straddle words"""
+    words = [word for _, keywords in INTENT_KEYWORDS for word in keywords]
+    pieces = []
+    for _ in range(rng.randint(0, 12)):
+        word = rng.choice(words)
+        if rng.random() < 0.5:
+            start = rng.randint(0, len(word) - 1)
+            word = word[start:rng.randint(start + 1, len(word))]
+        pieces.append(word.upper() if rng.random() < 0.2 else word)
+        pieces.append(rng.choice(["", " ", "?", "x"]))
+    return "".join(pieces)
+
+def time_per_call(fn, message: str, repeats: int) -> float:
+    """
+    Returns:
+        float: Median microseconds per call over 5 rounds
+    """
+    rounds = []
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeats):
+            fn(message)
+        rounds.append((time.perf_counter() - start) / repeats * 1e6)
+    return sorted(rounds)[2]
+
+if __name__ == "__main__":
+    print("FieldScore AI - Fallback Intent Matcher Benchmark\n")
+
+    # Equivalence on random keyword soup, across languages
+    rng = random.Random(42)
+    for _ in range(100_000):
+        message = random_message(rng)
+        language = rng.choice(["en", "uz", "ru", "xx"])
+        expected = legacy_fallback_response(message, language)
+        assert get_fallback_response(message, language) == expected, message
+        assert regex_fallback_response(message, language) == expected, message
+    for length in (100, 10_000):
+        for message in adversarial_messages(length).values():
+            assert get_fallback_response(message) == legacy_fallback_response(message)
+    print("✓ Same answers as the legacy scan on 100,000 random messages\n")
+
+    print(f"{'input':<34} {'chars':>7} {'legacy':>11} {'regex':>11} {'tables':>11} {'speed-up':>9}")
+    cases = [(f"typical: {message[:24]}", message) for message in TYPICAL_MESSAGES]
+    for length in (1_000, 100_000):
+        cases += list(adversarial_messages(length).items())
+
+    for name, message in cases:
+        repeats = max(5, 200_000 // max(len(message), 1))
+        legacy = time_per_call(legacy_fallback_response, message, repeats)
+        regex = time_per_call(regex_fallback_response, message, repeats)
+        tables = time_per_call(get_fallback_response, message, repeats)
+        print(f"{name:<34} {len(message):>7} {legacy:>8.1f} us {regex:>8.1f} us "
+              f"{tables:>8.1f} us {legacy / tables:>8.1f}x")
+
+    print(f"\nmatch_intent('what is ndvi') = {match_intent('what is ndvi')!r}")
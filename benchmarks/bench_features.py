@@ -0,0 +1,99 @@
+"""
+FieldScore AI - Feature Encoding Benchmark
+Checks that the shared feature schema encodes FarmInput records and DataFrames
+identically, and that training rows read through the dataset cache encode as
+the API encodes the same farms. Then times it against the previous per-request
+encoding (a Python list per farm copied into a float64 matrix, then cast by the
+model)
+
+Run from the project root: python benchmarks/bench_features.py
+"""
+
+import os
+import sys
+import tempfile
+import timeit
+
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'data'))
+
+from api import FarmInput
+from benchmarks.bench_api import random_farms
+from dataset_cache import read_dataset
+from feature_schema import FEATURE_SCHEMA
+from train_model import TRAINING_COLUMNS, prepare_features_target
+
+SIZES = [1, 100, 10_000]
+LEGACY_CROP_ENCODING = {crop: code for code, crop in enumerate(FEATURE_SCHEMA.categories['crop_type'])}
+
+def legacy_feature_matrix(farms: list) -> np.ndarray:
+    """The API's encoding before the feature schema"""
+    X = np.empty((len(farms), FEATURE_SCHEMA.n_features), dtype=np.float64)
+    for i, farm in enumerate(farms):
+        X[i] = [
+            farm.farm_area_hectares,
+            farm.ndvi_mean_12mo,
+            farm.ndvi_slope,
+            farm.ndvi_14day_delta,
+            farm.ndvi_anomaly_zscore,
+            farm.rainfall_deficit_30day,
+            farm.coefficient_of_variation,
+            farm.soil_organic_carbon,
+            LEGACY_CROP_ENCODING.get(farm.crop_type.lower(), 0),
+            farm.loan_amount_usd
+        ]
+    return X.astype(np.float32)
+
+def check_equivalence(n: int):
+    dicts = random_farms(n, seed=11)
+    dicts[0]['crop_type'] = 'Quinoa'
+    dicts[1]['crop_type'] = 'COFFEE'
+    farms = [FarmInput(**farm) for farm in dicts]
+    expected = legacy_feature_matrix(farms)
+    assert np.array_equal(FEATURE_SCHEMA.encode(farms), expected), "records"
+    assert np.array_equal(FEATURE_SCHEMA.encode_row(farms[0]), expected[:1]), "single row"
+    assert np.array_equal(FEATURE_SCHEMA.encode_frame(pd.DataFrame(dicts)), expected), "DataFrame"
+    # Categoricals are looked up case-insensitively too, whatever their categories
+    categorical = pd.DataFrame(dicts)
+    categorical['crop_type'] = categorical['crop_type'].astype('category')
+    assert np.array_equal(FEATURE_SCHEMA.encode_frame(categorical), expected), "categorical DataFrame"
+
+def check_training_encoding():
+    """Training rows read through the dataset cache encode as the API encodes the same farms"""
+    crops = ['Tea', 'TEA', 'Coffee', 'maize', 'Quinoa', 'POTATO']
+    dicts = random_farms(len(crops), seed=12)
+    for farm, crop in zip(dicts, crops):
+        farm.update(crop_type=crop, loan_outcome='repaid', risk_score=50, risk_category='medium')
+    expected = FEATURE_SCHEMA.encode([FarmInput(**farm) for farm in dicts])
+
+    workdir = tempfile.mkdtemp(prefix="fieldscore-features-")
+    csv_path = os.path.join(workdir, 'training_data.csv')
+    pd.DataFrame(dicts).to_csv(csv_path, index=False)
+    df = read_dataset(csv_path, columns=TRAINING_COLUMNS,
+                      schema_path=os.path.join(ROOT, 'data', 'training_data_schema.json'),
+                      cache_path=os.path.join(workdir, 'training_data.parquet'))
+    X, _, _, _ = prepare_features_target(df)
+    assert np.array_equal(X.to_numpy(), expected), f"training {X['crop_type_encoded'].tolist()}"
+
+def per_farm_us(fn, farms: list) -> float:
+    number = max(1, 50_000 // len(farms))
+    return min(timeit.repeat(lambda: fn(farms), number=number, repeat=5)) / number / len(farms) * 1e6
+
+if __name__ == "__main__":
+    print("FieldScore AI - Feature Encoding Benchmark\n")
+
+    check_equivalence(5_000)
+    print("✓ Records, single rows and DataFrames encode identically to the previous encoding")
+    check_training_encoding()
+    print("✓ Training rows from the dataset cache encode as the API does, mixed-case and unknown crops included\n")
+
+    print(f"{'farms':>7} {'previous µs/farm':>17} {'schema µs/farm':>15} {'speedup':>8}")
+    for n in SIZES:
+        farms = [FarmInput(**farm) for farm in random_farms(n)]
+        previous = per_farm_us(legacy_feature_matrix, farms)
+        schema = per_farm_us(FEATURE_SCHEMA.encode, farms)
+        print(f"{n:>7,} {previous:>17.3f} {schema:>15.3f} {previous / schema:>7.1f}x")
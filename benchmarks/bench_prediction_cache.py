@@ -0,0 +1,96 @@
+"""
+FieldScore AI - Prediction Cache Benchmark
+Checks that the prediction cache never changes an answer: farms placed next to
+every label threshold (and on the far side of its rounding step) are sent to
+/predict with the cache, twice (miss, then hit), and without it, and the three
+bodies must be identical. Then times /predict cache hits against misses.
+
+Scoring is rule-based; confidences are simulated, so the random generator is
+reseeded before each request.
+
+Run from the project root: python benchmarks/bench_prediction_cache.py
+"""
+
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.bench_api import random_farms
+from prediction_cache import QUANTIZE_DECIMALS, PredictionCache
+from scoring import LABEL_THRESHOLDS
+
+BASE_FARM = {
+    "latitude": -1.2921,
+    "longitude": 36.8219,
+    "crop_type": "maize",
+    "farm_area_hectares": 2.5,
+    "ndvi_mean_12mo": 0.65,
+    "ndvi_slope": 0.0,
+    "ndvi_14day_delta": -0.02,
+    "ndvi_anomaly_zscore": -0.35,
+    "rainfall_deficit_30day": 45.0,
+    "coefficient_of_variation": 0.3,
+    "soil_organic_carbon": 1.8,
+    "loan_amount_usd": 1500
+}
+
+def near_threshold_farms() -> list:
+    """Farms whose value is a fraction of a rounding step (or 0.5-1.5 steps) from a threshold"""
+    farms = []
+    for name, thresholds in LABEL_THRESHOLDS.items():
+        step = 10.0 ** -QUANTIZE_DECIMALS[name]
+        for threshold in thresholds:
+            for offset in (-1.5, -1.0, -0.6, -0.4, -0.04, 0.0, 0.04, 0.4, 0.6, 1.0, 1.5):
+                farms.append({**BASE_FARM, name: threshold + offset * step})
+    return farms
+
+def body(client, api, farm: dict, cache) -> bytes:
+    api.prediction_cache = cache
+    np.random.seed(0)
+    response = client.post("/predict", json=farm)
+    assert response.status_code == 200, response.text
+    return response.content
+
+def check_identical(client, api, farms: list):
+    # One cache for all farms, so neighbours share it the way real traffic does
+    cache = PredictionCache()
+    for farm in farms:
+        uncached = body(client, api, farm, None)
+        assert body(client, api, farm, cache) == uncached, f"miss differs: {farm}"
+        assert body(client, api, farm, cache) == uncached, f"hit differs: {farm}"
+
+def time_predict(client, api, farms: list, cache) -> float:
+    """Mean ms per /predict call"""
+    api.prediction_cache = cache
+    start = time.perf_counter()
+    for farm in farms:
+        client.post("/predict", json=farm)
+    return (time.perf_counter() - start) / len(farms) * 1000
+
+if __name__ == "__main__":
+    # Rule-based scoring from an empty directory, so a models/ artifact is never picked up
+    workdir = tempfile.mkdtemp(prefix="fieldscore-cache-")
+    os.environ.update({"MODEL_REGISTRY_DIR": os.path.join(workdir, "registry"), "OPENAI_API_KEY": ""})
+    os.chdir(workdir)
+    import api
+    from fastapi.testclient import TestClient
+
+    print("FieldScore AI - Prediction Cache Benchmark\n")
+    with TestClient(api.app) as client:
+        farms = near_threshold_farms()
+        check_identical(client, api, farms)
+        print(f"✓ /predict bodies identical with and without the cache for {len(farms)} near-threshold farms\n")
+
+        farms = random_farms(2000)
+        cache = PredictionCache()
+        time_predict(client, api, farms, None)
+        miss = time_predict(client, api, farms, cache)
+        hit = time_predict(client, api, farms, cache)
+        print(f"{'no cache':<10} {time_predict(client, api, farms, None):7.3f} ms/request")
+        print(f"{'miss':<10} {miss:7.3f} ms/request")
+        print(f"{'hit':<10} {hit:7.3f} ms/request")
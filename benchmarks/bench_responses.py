@@ -0,0 +1,151 @@
+"""
+FieldScore AI - Response Encoding Benchmark
+Checks that FAST_RESPONSES=1 returns the same bytes as the default response
+path, then drives /predict and /predict/batch in-process (ASGI transport) with
+each and reports the share of server time spent in the "serialize" stage of
+the Server-Timing header:
+
+    standard   records validated through response_model, then rendered by
+               FastAPI's JSON encoder
+    fast       records written straight to JSON bytes (response_encoding.py)
+
+Requests are sent one at a time and scored by a small XGBoost model published
+to a temporary registry, as in bench_api.py; the prediction cache is off.
+
+Run from the project root: python benchmarks/bench_responses.py
+Results go to benchmarks/results/responses_<commit>.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+from datetime import datetime, timezone
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_api import JSON_HEADERS, git_commit, publish_synthetic_model, random_farms
+
+ENCODINGS = {"standard": False, "fast": True}
+BATCH_SIZES = [1, 100, 1000, 10_000]
+
+def server_timing(header: str) -> dict:
+    """Stage durations in ms from a Server-Timing header"""
+    stages = {}
+    for entry in header.split(","):
+        name, duration = entry.strip().split(";dur=")
+        stages[name] = stages.get(name, 0.0) + float(duration)
+    return stages
+
+async def post(client: httpx.AsyncClient, api, fast: bool, path: str, body: bytes) -> httpx.Response:
+    api.FAST_RESPONSES = fast
+    # Same confidences for both encodings
+    np.random.seed(0)
+    response = await client.post(path, content=body, headers=JSON_HEADERS)
+    response.raise_for_status()
+    return response
+
+async def check_equivalence(client: httpx.AsyncClient, api, farms: list):
+    for path, body in (("/predict", farms[0]), ("/predict/batch", farms), ("/predict/batch", [])):
+        body = json.dumps(body).encode()
+        standard = await post(client, api, False, path, body)
+        fast = await post(client, api, True, path, body)
+        assert fast.content == standard.content, f"{path}: bodies differ"
+        assert fast.headers["content-type"] == standard.headers["content-type"], f"{path}: content types differ"
+
+async def measure(client: httpx.AsyncClient, api, encoding: str, path: str, bodies: list, n_requests: int) -> dict:
+    """Median total and serialize ms, and serialize's share of all server time"""
+    api.FAST_RESPONSES = ENCODINGS[encoding]
+    totals, serializes = [], []
+    for i in range(n_requests):
+        response = await client.post(path, content=bodies[i % len(bodies)], headers=JSON_HEADERS)
+        response.raise_for_status()
+        stages = server_timing(response.headers["server-timing"])
+        totals.append(stages["total"])
+        serializes.append(stages["serialize"])
+    return {
+        "requests": n_requests,
+        "total_ms": round(statistics.median(totals), 3),
+        "serialize_ms": round(statistics.median(serializes), 3),
+        "serialize_share": round(sum(serializes) / sum(totals), 4),
+    }
+
+async def run(api, args) -> list:
+    farms = random_farms(max(args.batch_sizes))
+    results = []
+    transport = httpx.ASGITransport(app=api.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+        await check_equivalence(client, api, farms[:1000])
+        print("✓ FAST_RESPONSES=1 returns the same bytes as the default response path\n")
+
+        print(f"{'endpoint':<15} {'batch':>6} {'encoding':<9} {'reqs':>5} {'total ms':>9} "
+              f"{'serialize ms':>12} {'share':>6}")
+        scenarios = [("/predict", 1, [json.dumps(farm).encode() for farm in farms[:1000]])]
+        scenarios += [("/predict/batch", size, [json.dumps(farms[i:i + size]).encode()
+                                                for i in range(0, len(farms) - size + 1, size)][:100])
+                      for size in args.batch_sizes]
+        for path, size, bodies in scenarios:
+            n_requests = max(args.min_batch_requests, args.requests // size)
+            for encoding in ENCODINGS:
+                await measure(client, api, encoding, path, bodies, min(args.warmup, n_requests))
+                result = {"endpoint": path, "batch_size": size, "encoding": encoding,
+                          **await measure(client, api, encoding, path, bodies, n_requests)}
+                results.append(result)
+                print(f"{path:<15} {size:>6} {encoding:<9} {result['requests']:>5} {result['total_ms']:>9.3f} "
+                      f"{result['serialize_ms']:>12.3f} {result['serialize_share']:>6.1%}")
+    return results
+
+def main(args) -> int:
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="fieldscore-responses-")
+    registry_dir = os.path.join(workdir, "registry")
+    # The app reads its configuration at import; run it from an empty directory
+    # so a models/ artifact in the checkout is never picked up
+    os.environ.update({"MODEL_REGISTRY_DIR": registry_dir, "OPENAI_API_KEY": "",
+                       "PREDICTION_CACHE_SIZE": "0", "MODEL_WATCH_INTERVAL": "0", "SERVER_TIMING": "1"})
+    os.chdir(workdir)
+    try:
+        import api
+
+        publish_synthetic_model(api, registry_dir)
+        api.registry.activate()
+        print("FieldScore AI - Response Encoding Benchmark\n")
+        results = asyncio.run(run(api, args))
+    finally:
+        os.chdir(ROOT)
+
+    report = {
+        "meta": {
+            **git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(os.path.join(ROOT, "benchmarks", "results"), exist_ok=True)
+        output = os.path.join(ROOT, "benchmarks", "results", f"responses_{report['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FieldScore AI response encoding benchmark")
+    parser.add_argument("--batch-sizes", nargs="+", type=int, default=BATCH_SIZES)
+    parser.add_argument("--requests", type=int, default=1000,
+                        help="Requests per /predict scenario; batches send requests / batch size")
+    parser.add_argument("--min-batch-requests", type=int, default=20)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/responses_<commit>.json)")
+    sys.exit(main(parser.parse_args()))
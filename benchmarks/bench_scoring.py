@@ -0,0 +1,119 @@
+"""
+FieldScore AI - Scoring Engine Benchmark
+Checks the vectorized engine in scoring.py against the scalar functions in
+api.py, both on raw matrices and on FarmInput records encoded the way the API
+encodes them, and times a full-portfolio rescore
+
+Run from the project root: python benchmarks/bench_scoring.py [n_farms]
+"""
+
+import os
+import sys
+import time
+from types import SimpleNamespace
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api import FarmInput, categorize_risk, interpret_features, rule_based_prediction, score_matrix_records
+from benchmarks.bench_api import random_farms
+from feature_schema import FEATURE_SCHEMA, SCORING_DTYPE
+from scoring import (
+    FEATURE_COLUMNS,
+    RISK_CATEGORIES,
+    categorize_risk_batch,
+    interpret_features_batch,
+    prediction_records,
+    rule_based_prediction_batch,
+)
+
+def random_portfolio(n, seed=42):
+    """
+    Generate n random farms covering every interpretation band
+    """
+    rng = np.random.default_rng(seed)
+    columns = {
+        'farm_area_hectares': rng.uniform(0.5, 10, n),
+        'ndvi_mean_12mo': rng.uniform(0.2, 0.95, n),
+        'ndvi_slope': rng.uniform(-0.05, 0.05, n),
+        'ndvi_14day_delta': rng.uniform(-0.15, 0.15, n),
+        'ndvi_anomaly_zscore': rng.uniform(-4, 4, n),
+        'rainfall_deficit_30day': rng.uniform(0, 120, n),
+        'coefficient_of_variation': rng.uniform(0, 1, n),
+        'soil_organic_carbon': rng.uniform(0, 5, n),
+        'crop_type_encoded': rng.integers(0, 11, n).astype(float),
+        'loan_amount_usd': rng.uniform(100, 10000, n),
+    }
+    # Round like real client input so band edges (e.g. exactly 30 mm) are hit
+    X = np.column_stack([np.round(columns[name], 3) for name in FEATURE_COLUMNS])
+    return X
+
+def check_equivalence(X):
+    """
+    Compare vectorized and scalar outputs row by row
+    """
+    scores, _ = rule_based_prediction_batch(X)
+    categories = categorize_risk_batch(scores)
+    interpretations = interpret_features_batch(X)
+
+    for i, row in enumerate(X):
+        farm = SimpleNamespace(**dict(zip(FEATURE_COLUMNS, row.tolist())))
+        score, _ = rule_based_prediction(farm)
+        assert score == scores[i], f"row {i}: score {score} != {scores[i]}"
+        assert categorize_risk(score) == RISK_CATEGORIES[categories[i]], f"row {i}: category"
+        expected = interpret_features(farm)
+        for key, labels in interpretations.items():
+            assert expected[key] == labels[i], f"row {i}: {key}"
+
+def check_api_parity(n):
+    """
+    Encode random FarmInput records with the feature schema, as the batch,
+    stream and cached /predict paths do, and compare their rule-based records
+    with the scalar functions
+    """
+    farms = [FarmInput(**farm) for farm in random_farms(n, seed=1)]
+    X = FEATURE_SCHEMA.encode(farms, dtype=SCORING_DTYPE)
+    for i, (farm, record) in enumerate(zip(farms, score_matrix_records(X, None))):
+        score, _ = rule_based_prediction(farm)
+        assert record['risk_score'] == score, f"farm {i}: score {score} != {record['risk_score']}"
+        assert record['features'] == interpret_features(farm), f"farm {i}: features"
+
+def time_scalar(X):
+    start = time.perf_counter()
+    for row in X:
+        farm = SimpleNamespace(**dict(zip(FEATURE_COLUMNS, row.tolist())))
+        score, _ = rule_based_prediction(farm)
+        categorize_risk(score)
+        interpret_features(farm)
+    return time.perf_counter() - start
+
+def time_vectorized(X):
+    start = time.perf_counter()
+    scores, confidences = rule_based_prediction_batch(X)
+    categorize_risk_batch(scores)
+    interpret_features_batch(X)
+    scored = time.perf_counter() - start
+    prediction_records(X, scores, confidences)
+    return scored, time.perf_counter() - start
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+
+    print("FieldScore AI - Scoring Engine Benchmark\n")
+
+    check_equivalence(random_portfolio(50_000, seed=7))
+    print("✓ Vectorized engine matches scalar functions on 50,000 farms")
+    check_api_parity(20_000)
+    print("✓ Schema-encoded FarmInput records score like the scalar functions on 20,000 farms")
+
+    X = random_portfolio(n)
+
+    sample = X[:20_000]
+    scalar_seconds = time_scalar(sample) * (n / len(sample))
+    scored_seconds, total_seconds = time_vectorized(X)
+
+    print(f"\nFarms: {n:,}")
+    print(f"Scalar (extrapolated):        {scalar_seconds:8.2f} s")
+    print(f"Vectorized scores + labels:   {scored_seconds:8.2f} s")
+    print(f"Vectorized incl. row records: {total_seconds:8.2f} s")
@@ -0,0 +1,72 @@
+"""
+FieldScore AI - Stage Timing Overhead Benchmark
+Measures what the per-stage instrumentation of /predict and /chat adds to
+each request: the middleware around a no-op ASGI app, the endpoint and
+worker marks, the histogram updates and the Server-Timing header
+
+Run from the project root: python benchmarks/bench_stage_timing.py [n_requests]
+"""
+
+import asyncio
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from metrics import RequestMetrics, StageTimingMiddleware
+
+SCOPE = {"type": "http", "path": "/predict", "root_path": "", "headers": []}
+START = {"type": "http.response.start", "status": 200, "headers": [(b"content-type", b"application/json")]}
+BODY = {"type": "http.response.body", "body": b"{}"}
+
+async def endpoint_app(scope, receive, send):
+    """Stands in for FastAPI: marks the stages /predict marks, then responds"""
+    timing = scope.get("state", {}).get("timing")
+    if timing is not None:
+        timing.mark("validate")
+        timing.path = "model"
+        # Worker side: three stage boundaries
+        start = time.perf_counter()
+        built = time.perf_counter()
+        scored = time.perf_counter()
+        stages = [("features", built - start), ("model", scored - built), ("interpret", time.perf_counter() - scored)]
+        timing.mark("inference")
+        timing.add(stages)
+    await send(dict(START))
+    await send(BODY)
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+async def send(message):
+    pass
+
+async def time_app(app, n: int) -> float:
+    """Seconds per request"""
+    start = time.perf_counter()
+    for _ in range(n):
+        await app(dict(SCOPE), receive, send)
+    return (time.perf_counter() - start) / n
+
+async def run(n: int):
+    metrics = RequestMetrics()
+    variants = [
+        ("no instrumentation", endpoint_app),
+        ("timing + /metrics", StageTimingMiddleware(endpoint_app, metrics, ["/predict"], server_timing=False)),
+        ("timing + Server-Timing", StageTimingMiddleware(endpoint_app, metrics, ["/predict"], server_timing=True)),
+    ]
+    for _, app in variants:
+        await time_app(app, 1000)  # warm-up
+
+    baseline = None
+    for label, app in variants:
+        seconds = min([await time_app(app, n) for _ in range(5)])
+        baseline = baseline if baseline is not None else seconds
+        print(f"{label:<24} {seconds * 1e6:7.2f} µs/request   overhead {(seconds - baseline) * 1e6:6.2f} µs")
+
+if __name__ == "__main__":
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+
+    print("FieldScore AI - Stage Timing Overhead Benchmark\n")
+    asyncio.run(run(n))
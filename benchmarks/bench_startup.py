@@ -0,0 +1,186 @@
+"""
+FieldScore AI - Startup Benchmark
+Measures how quickly a fresh API process can serve traffic:
+
+    import      wall time of `import api`, and the slowest modules it pulls in
+                (from python -X importtime)
+    uvicorn     time from spawning a worker to the first 200 from GET /
+                (live), GET /ready (model loaded and warm) and POST /predict,
+                with MODEL_LOAD=startup and MODEL_LOAD=background
+
+The worker serves a small XGBoost model published to a temporary registry, as
+in bench_api.py. Pass --app-dir with another checkout (e.g. a git worktree of
+an older commit) to measure that code instead; endpoints it does not have are
+reported as "-".
+
+Run from the project root: python benchmarks/bench_startup.py
+Results go to benchmarks/results/startup_<commit>.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_api import git_commit, publish_synthetic_model, random_farms
+from benchmarks.load_test_chat_isolation import free_port, start_server
+
+MODEL_LOADS = ["startup", "background"]
+POLL_INTERVAL_S = 0.01
+
+def import_wall_times(app_dir: str, workdir: str, env: dict, repeats: int) -> list:
+    """Seconds to `import api` in fresh interpreters"""
+    code = "import time; t = time.perf_counter(); import api; print(time.perf_counter() - t)"
+    times = []
+    for _ in range(repeats):
+        out = subprocess.run([sys.executable, "-c", code], cwd=workdir, capture_output=True, text=True,
+                             env={**os.environ, **env, "PYTHONPATH": app_dir}, check=True).stdout
+        times.append(float(out.strip().splitlines()[-1]))
+    return times
+
+def import_profile(app_dir: str, workdir: str, env: dict, top: int) -> list:
+    """
+    Slowest top-level imports of `import api`
+
+    Returns:
+        list: {"module", "cumulative_ms"} for the `top` slowest modules imported
+        directly by api or by a project module
+    """
+    stderr = subprocess.run([sys.executable, "-X", "importtime", "-c", "import api"], cwd=workdir,
+                            capture_output=True, text=True, env={**os.environ, **env, "PYTHONPATH": app_dir},
+                            check=True).stderr
+    project = {name[:-3] for name in os.listdir(app_dir) if name.endswith(".py")}
+    modules = {}
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line or "self [us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:"):].split("|")
+        # One space after the bar, then two per nesting level: depth 0 is `api` itself
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        name = name.strip()
+        if depth <= 1 or name.split(".")[0] in project:
+            modules[name] = max(modules.get(name, 0), int(cumulative) / 1000)
+    ranked = sorted(modules.items(), key=lambda item: -item[1])
+    return [{"module": name, "cumulative_ms": round(ms, 1)} for name, ms in ranked[:top]]
+
+async def first_ok(client: httpx.AsyncClient, method: str, path: str, deadline: float, **kwargs):
+    """
+    Poll until `path` answers 200
+
+    Returns:
+        float | None: perf_counter() of the first 200, or None if the endpoint
+        does not exist (404/405)
+    """
+    while time.perf_counter() < deadline:
+        try:
+            response = await client.request(method, path, **kwargs)
+        except httpx.TransportError:
+            await asyncio.sleep(POLL_INTERVAL_S)
+            continue
+        if response.status_code == 200:
+            return time.perf_counter()
+        if response.status_code in (404, 405):
+            return None
+        await asyncio.sleep(POLL_INTERVAL_S)
+    raise RuntimeError(f"{path} did not answer 200 in time")
+
+async def time_to_first_request(app_dir: str, workdir: str, env: dict, model_load: str, timeout: float) -> dict:
+    """Seconds from spawning a uvicorn worker until /, /ready and /predict first answer 200"""
+    port = free_port()
+    farm = random_farms(1)[0]
+    start = time.perf_counter()
+    server = start_server("api:app", port, {**env, "PYTHONPATH": app_dir, "MODEL_LOAD": model_load}, cwd=workdir)
+    try:
+        deadline = start + timeout
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=timeout) as client:
+            live = await first_ok(client, "GET", "/", deadline)
+            ready = await first_ok(client, "GET", "/ready", deadline)
+            predict = await first_ok(client, "POST", "/predict", deadline, json=farm)
+            version = (await client.post("/predict", json=farm)).headers.get("x-model-version")
+    finally:
+        server.terminate()
+        server.wait()
+
+    def since_start(t):
+        return round(t - start, 3) if t is not None else None
+
+    return {"model_load": model_load, "live_s": since_start(live), "ready_s": since_start(ready),
+            "first_predict_s": since_start(predict), "model_version": version}
+
+def main(args) -> int:
+    app_dir = os.path.abspath(args.app_dir)
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="fieldscore-startup-")
+    registry_dir = os.path.join(workdir, "registry")
+    # Run from an empty directory so a models/ artifact in the checkout is never picked up
+    env = {"MODEL_REGISTRY_DIR": registry_dir, "OPENAI_API_KEY": ""}
+    os.environ.update(env)
+    os.chdir(workdir)
+    try:
+        import api
+
+        publish_synthetic_model(api, registry_dir)
+        print("FieldScore AI - Startup Benchmark\n")
+        print(f"App: {app_dir}\n")
+
+        times = import_wall_times(app_dir, workdir, env, args.repeats)
+        profile = import_profile(app_dir, workdir, env, args.top)
+        print(f"import api: median {statistics.median(times) * 1000:.0f} ms "
+              f"(min {min(times) * 1000:.0f} ms, {len(times)} runs)")
+        for entry in profile:
+            print(f"  {entry['module']:<40} {entry['cumulative_ms']:8.1f} ms")
+
+        print(f"\n{'MODEL_LOAD':<11} {'live s':>8} {'ready s':>8} {'predict s':>10}  model")
+        runs = []
+        for model_load in args.model_loads:
+            for _ in range(args.repeats):
+                runs.append(asyncio.run(time_to_first_request(app_dir, workdir, env, model_load, args.timeout)))
+                result = runs[-1]
+                print(f"{model_load:<11} " + " ".join(
+                    f"{result[name]:>{width}.3f}" if result[name] is not None else f"{'-':>{width}}"
+                    for name, width in (("live_s", 8), ("ready_s", 8), ("first_predict_s", 10))
+                ) + f"  {result['model_version']}")
+    finally:
+        os.chdir(ROOT)
+
+    report = {
+        "meta": {
+            **git_commit(),
+            "app_dir": app_dir,
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "import": {"wall_s": [round(t, 4) for t in times], "top_modules": profile},
+        "first_request": runs,
+    }
+    if output is None:
+        os.makedirs(os.path.join(ROOT, "benchmarks", "results"), exist_ok=True)
+        output = os.path.join(ROOT, "benchmarks", "results", f"startup_{report['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FieldScore AI startup benchmark")
+    parser.add_argument("--app-dir", default=ROOT, help="Checkout whose api.py is measured (default: this one)")
+    parser.add_argument("--model-loads", nargs="+", default=MODEL_LOADS, choices=MODEL_LOADS)
+    parser.add_argument("--repeats", type=int, default=3, help="Runs per measurement")
+    parser.add_argument("--top", type=int, default=15, help="Modules listed in the import profile")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds to wait for a worker")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/startup_<commit>.json)")
+    sys.exit(main(parser.parse_args()))
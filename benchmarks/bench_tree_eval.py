@@ -0,0 +1,120 @@
+"""
+FieldScore AI - Native Tree Evaluator Benchmark
+Compares tree_eval.CompiledTreeEnsemble against model.predict for accuracy
+and latency (single rows and batches)
+
+Run from the project root: python benchmarks/bench_tree_eval.py [model_path]
+Without a trained model at models/risk_score_regressor.pkl, a model with the
+train_model.py hyperparameters is fitted on data/training_data.csv first.
+"""
+
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from scoring import FEATURE_COLUMNS
+from tree_eval import CompiledTreeEnsemble
+
+# Feature ranges from docs/DATA_DOCUMENTATION.md, used for random inputs
+FEATURE_RANGES = {
+    'farm_area_hectares': (0.5, 10),
+    'ndvi_mean_12mo': (0.2, 0.95),
+    'ndvi_slope': (-0.05, 0.05),
+    'ndvi_14day_delta': (-0.15, 0.15),
+    'ndvi_anomaly_zscore': (-4, 4),
+    'rainfall_deficit_30day': (0, 120),
+    'coefficient_of_variation': (0, 1),
+    'soil_organic_carbon': (0, 5),
+    'crop_type_encoded': (0, 10),
+    'loan_amount_usd': (100, 10000),
+}
+
+def load_or_train(model_path):
+    if os.path.exists(model_path):
+        print(f"Using model: {model_path}")
+        return joblib.load(model_path)
+
+    import xgboost as xgb
+    print("No trained model found; fitting one on data/training_data.csv")
+    df = pd.read_csv(os.path.join(ROOT, 'data', 'training_data.csv'))
+    df['crop_type_encoded'] = df['crop_type'].astype('category').cat.codes
+    model = xgb.XGBRegressor(
+        n_estimators=100, max_depth=6, learning_rate=0.1, subsample=0.8,
+        colsample_bytree=0.8, random_state=42, objective='reg:squarederror'
+    )
+    model.fit(df[FEATURE_COLUMNS], df['risk_score'])
+    return model
+
+def random_features(n, missing_rate=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    X = np.column_stack([rng.uniform(*FEATURE_RANGES[name], n) for name in FEATURE_COLUMNS])
+    X[rng.random(X.shape) < missing_rate] = np.nan
+    return X.astype(np.float32)
+
+def check_unnamed_trailing_features():
+    """
+    A booster fitted on a bare array (as data/tuning.py and
+    data/external_memory.py fit) has no feature names; its trailing features
+    may never be split on, and must still count towards n_features
+    """
+    import xgboost as xgb
+    rng = np.random.default_rng(3)
+    X = rng.random((500, len(FEATURE_COLUMNS)), dtype=np.float32)
+    X[:, -3:] = 0.0  # never split on
+    model = xgb.XGBRegressor(n_estimators=10, max_depth=3)
+    model.fit(X, X[:, 0] * 10 + X[:, 1])
+    compiled = CompiledTreeEnsemble.from_model(model)
+    assert compiled.feature_names is None
+    assert compiled.n_features == len(FEATURE_COLUMNS), compiled.n_features
+    diff = np.abs(model.predict(X) - compiled.predict(X)).max()
+    assert diff < 1e-3, "Native evaluator diverges from the booster"
+    print(f"✓ Unnamed booster with unused trailing features compiled with {compiled.n_features} features\n")
+
+def time_calls(fn, X, repeats):
+    """
+    Returns:
+        np.ndarray: Per-call latency in microseconds
+    """
+    fn(X)  # warm-up
+    latencies = np.empty(repeats)
+    for i in range(repeats):
+        start = time.perf_counter()
+        fn(X)
+        latencies[i] = (time.perf_counter() - start) * 1e6
+    return latencies
+
+if __name__ == "__main__":
+    model_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(ROOT, 'models', 'risk_score_regressor.pkl')
+
+    print("FieldScore AI - Native Tree Evaluator Benchmark\n")
+
+    check_unnamed_trailing_features()
+
+    model = load_or_train(model_path)
+
+    start = time.perf_counter()
+    compiled = CompiledTreeEnsemble.from_model(model)
+    print(f"Compiled {compiled.n_trees} trees (max depth {compiled.max_depth}) "
+          f"in {(time.perf_counter() - start) * 1000:.1f} ms\n")
+
+    # Accuracy, including missing values that exercise default directions
+    for missing_rate in (0.0, 0.1):
+        X = random_features(50_000, missing_rate=missing_rate, seed=1)
+        diff = np.abs(model.predict(X) - compiled.predict(X)).max()
+        print(f"Max |native - model.predict| (missing={missing_rate:.0%}): {diff:.2e}")
+        assert diff < 1e-3, "Native evaluator diverges from the booster"
+    print()
+
+    print(f"{'rows':>7} {'model.predict p50':>19} {'native p50':>12} {'speed-up':>9}")
+    for n_rows, repeats in ((1, 2000), (10, 1000), (100, 500), (1000, 100), (10_000, 20)):
+        X = random_features(n_rows, seed=2)
+        booster = np.median(time_calls(model.predict, X, repeats))
+        native = np.median(time_calls(compiled.predict, X, repeats))
+        print(f"{n_rows:>7} {booster:>16.1f} us {native:>9.1f} us {booster / native:>8.1f}x")
@@ -0,0 +1,179 @@
+"""
+FieldScore AI - Multi-Worker Memory Benchmark
+Starts the API with several workers in three ways and reports the memory of
+every process once all workers are up and have served traffic:
+
+    uvicorn            uvicorn --workers N; every worker is a fresh
+                       interpreter that imports the app and loads the model
+    gunicorn           gunicorn.conf.py with PRELOAD_APP=0; forked workers,
+                       each still imports the app and loads the model
+    gunicorn-prefork   gunicorn.conf.py (preload_app, MODEL_LOAD=prefork); the
+                       master loads the model once and the workers share it
+
+RSS counts shared pages in full for every process. PSS splits them between
+the processes sharing them, so the PSS total is the real footprint. USS is
+the memory private to one process, i.e. what one more worker costs.
+
+Run from the project root: python benchmarks/bench_worker_memory.py [--workers 4]
+Results go to benchmarks/results/worker_memory_<commit>.json.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.bench_api import git_commit, publish_synthetic_model, random_farms
+from benchmarks.load_test_chat_isolation import free_port
+
+DEPLOYMENTS = ["uvicorn", "gunicorn", "gunicorn-prefork"]
+STARTUP_LINE = "Application startup complete"
+
+def start_deployment(deployment: str, port: int, workers: int, env: dict, cwd: str, log) -> subprocess.Popen:
+    if deployment == "uvicorn":
+        command = [sys.executable, "-m", "uvicorn", "api:app", "--port", str(port), "--workers", str(workers)]
+    else:
+        command = [sys.executable, "-m", "gunicorn", "api:app", "-c", os.path.join(ROOT, "gunicorn.conf.py")]
+        env = {**env, "BIND": f"127.0.0.1:{port}", "WEB_CONCURRENCY": str(workers),
+               "PRELOAD_APP": "1" if deployment == "gunicorn-prefork" else "0"}
+    return subprocess.Popen(command, cwd=cwd, env={**os.environ, **env}, stdout=log, stderr=subprocess.STDOUT)
+
+def wait_workers(log_path: str, workers: int, timeout: float):
+    """Wait until every worker has logged the end of its lifespan startup"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        with open(log_path) as f:
+            if f.read().count(STARTUP_LINE) >= workers:
+                return
+        time.sleep(0.1)
+    raise RuntimeError(f"{workers} workers did not start in {timeout:.0f} s")
+
+def child_pids(pid: int) -> list:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        return [int(child) for child in f.read().split()]
+
+def process_memory(pid: int) -> dict:
+    """RSS, PSS and USS in MB from /proc/<pid>/smaps_rollup"""
+    fields = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            parts = line.split()
+            if len(parts) == 3 and parts[2] == "kB":
+                fields[parts[0].rstrip(":")] = int(parts[1])
+    return {
+        "rss_mb": round(fields["Rss"] / 1024, 1),
+        "pss_mb": round(fields["Pss"] / 1024, 1),
+        "uss_mb": round((fields["Private_Clean"] + fields["Private_Dirty"]) / 1024, 1),
+    }
+
+async def send_traffic(port: int, n_requests: int):
+    """Single and batch predictions on fresh connections, so every worker gets some"""
+    farms = random_farms(100)
+    async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{port}", timeout=60,
+                                 headers={"connection": "close"}) as client:
+        for i in range(n_requests):
+            if i % 2:
+                response = await client.post("/predict/batch", json=farms)
+            else:
+                response = await client.post("/predict", json=farms[i % len(farms)])
+            response.raise_for_status()
+
+def measure(deployment: str, workers: int, env: dict, workdir: str, args) -> dict:
+    port = free_port()
+    log_path = os.path.join(workdir, f"{deployment}.log")
+    with open(log_path, "w") as log:
+        server = start_deployment(deployment, port, workers, env, workdir, log)
+        try:
+            start = time.perf_counter()
+            wait_workers(log_path, workers, args.timeout)
+            startup_s = time.perf_counter() - start
+            asyncio.run(send_traffic(port, args.requests))
+            time.sleep(1)
+            master = process_memory(server.pid)
+            worker_memory = [process_memory(pid) for pid in child_pids(server.pid)
+                             if "resource_tracker" not in open(f"/proc/{pid}/cmdline").read()]
+        finally:
+            server.terminate()
+            server.wait()
+    return {
+        "deployment": deployment,
+        "workers": len(worker_memory),
+        "startup_s": round(startup_s, 2),
+        "master": master,
+        "per_worker": worker_memory,
+        "total_pss_mb": round(master["pss_mb"] + sum(w["pss_mb"] for w in worker_memory), 1),
+    }
+
+def print_result(result: dict):
+    workers = result["per_worker"]
+    mean = {name: sum(w[name] for w in workers) / len(workers) for name in ("rss_mb", "pss_mb", "uss_mb")}
+    print(f"{result['deployment']:<17} {result['workers']:>7} {result['startup_s']:>9.1f} "
+          f"{result['master']['pss_mb']:>10.1f} {mean['rss_mb']:>10.1f} {mean['pss_mb']:>10.1f} "
+          f"{mean['uss_mb']:>10.1f} {result['total_pss_mb']:>10.1f}")
+
+def main(args) -> int:
+    output = os.path.abspath(args.output) if args.output else None
+    workdir = tempfile.mkdtemp(prefix="fieldscore-workers-")
+    registry_dir = os.path.join(workdir, "registry")
+    # Run from an empty directory so a models/ artifact in the checkout is never picked up
+    env = {"PYTHONPATH": ROOT, "MODEL_REGISTRY_DIR": registry_dir, "OPENAI_API_KEY": "",
+           "PREDICTION_CACHE_SIZE": "0", "MODEL_WATCH_INTERVAL": "0"}
+    os.environ.update(env)
+    os.chdir(workdir)
+    try:
+        import api
+
+        publish_synthetic_model(api, registry_dir, n_estimators=args.trees, max_depth=args.depth)
+        print("FieldScore AI - Multi-Worker Memory Benchmark\n")
+        print(f"Model: {args.trees} trees, depth {args.depth}; {args.requests} requests before measuring\n")
+        print(f"{'deployment':<17} {'workers':>7} {'startup s':>9} {'master PSS':>10} "
+              f"{'worker RSS':>10} {'worker PSS':>10} {'worker USS':>10} {'total PSS':>10}")
+        results = []
+        for deployment in args.deployments:
+            results.append(measure(deployment, args.workers, env, workdir, args))
+            print_result(results[-1])
+    finally:
+        os.chdir(ROOT)
+    print("\nWorker columns are per-worker means in MB; total PSS includes the master.")
+
+    report = {
+        "meta": {
+            **git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+            "trees": args.trees,
+            "depth": args.depth,
+        },
+        "results": results,
+    }
+    if output is None:
+        os.makedirs(os.path.join(ROOT, "benchmarks", "results"), exist_ok=True)
+        output = os.path.join(ROOT, "benchmarks", "results", f"worker_memory_{report['meta']['commit']}.json")
+    with open(output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"Results written to {output}")
+    return 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="FieldScore AI multi-worker memory benchmark")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--deployments", nargs="+", default=DEPLOYMENTS, choices=DEPLOYMENTS)
+    parser.add_argument("--trees", type=int, default=100, help="Trees in the synthetic model")
+    parser.add_argument("--depth", type=int, default=6, help="Depth of the synthetic model's trees")
+    parser.add_argument("--requests", type=int, default=200, help="Requests sent before measuring")
+    parser.add_argument("--timeout", type=float, default=300.0, help="Seconds to wait for the workers")
+    parser.add_argument("--output", help="Results JSON path (default: benchmarks/results/worker_memory_<commit>.json)")
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,157 @@
+"""
+FieldScore AI - /chat Isolation Load Test
+Shows that /predict latency stays flat while /chat is saturated with slow
+upstream calls. Starts the OpenAI stub and the API as real uvicorn servers,
+measures /predict alone, then again while many /chat requests are in flight.
+
+Run from the project root: python benchmarks/load_test_chat_isolation.py
+Exits non-zero if /predict p99 under chat load exceeds --max-p99-ratio x baseline.
+"""
+
+import argparse
+import asyncio
+import os
+import socket
+import subprocess
+import sys
+import time
+
+import httpx
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SAMPLE_FARM = {
+    "latitude": -1.2921,
+    "longitude": 36.8219,
+    "crop_type": "maize",
+    "farm_area_hectares": 2.5,
+    "ndvi_mean_12mo": 0.72,
+    "ndvi_slope": 0.015,
+    "ndvi_14day_delta": -0.02,
+    "ndvi_anomaly_zscore": -0.35,
+    "rainfall_deficit_30day": 15.2,
+    "coefficient_of_variation": 0.18,
+    "soil_organic_carbon": 1.8,
+    "loan_amount_usd": 1500
+}
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+def start_server(app: str, port: int, env: dict, cwd: str = ROOT) -> subprocess.Popen:
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", app, "--port", str(port), "--log-level", "warning"],
+        cwd=cwd,
+        env={**os.environ, **env}
+    )
+
+async def wait_ready(url: str, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient() as client:
+        while time.monotonic() < deadline:
+            try:
+                await client.get(url)
+                return
+            except httpx.TransportError:
+                await asyncio.sleep(0.1)
+    raise RuntimeError(f"Server at {url} did not start")
+
+async def measure_predict(client: httpx.AsyncClient, n_requests: int, concurrency: int) -> np.ndarray:
+    """
+    Fire n_requests /predict calls with fixed concurrency
+
+    Returns:
+        np.ndarray: Per-request latency in milliseconds
+    """
+    latencies = []
+    queue = asyncio.Queue()
+    for _ in range(n_requests):
+        queue.put_nowait(None)
+
+    async def worker():
+        while not queue.empty():
+            queue.get_nowait()
+            start = time.perf_counter()
+            response = await client.post("/predict", json=SAMPLE_FARM)
+            response.raise_for_status()
+            latencies.append((time.perf_counter() - start) * 1000)
+
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    return np.array(latencies)
+
+async def saturate_chat(client: httpx.AsyncClient, concurrency: int, stop: asyncio.Event) -> int:
+    """
+    Keep `concurrency` /chat requests in flight until stop is set
+
+    Returns:
+        int: Number of completed chat requests
+    """
+    completed = 0
+
+    async def worker(i):
+        nonlocal completed
+        while not stop.is_set():
+            await client.post("/chat", json={"message": f"What is NDVI? #{i}", "language": "en"})
+            completed += 1
+
+    tasks = [asyncio.create_task(worker(i)) for i in range(concurrency)]
+    await stop.wait()
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return completed
+
+def summarize(label: str, latencies: np.ndarray) -> float:
+    p50, p95, p99 = np.percentile(latencies, [50, 95, 99])
+    print(f"{label:<28} n={len(latencies):<6} p50={p50:7.2f} ms  p95={p95:7.2f} ms  p99={p99:7.2f} ms")
+    return p99
+
+async def run(args) -> int:
+    stub_port, api_port = free_port(), free_port()
+    stub = start_server("benchmarks.stub_openai:app", stub_port, {"STUB_LATENCY_S": str(args.upstream_latency)})
+    api = start_server("api:app", api_port, {
+        "OPENAI_API_KEY": "stub",
+        "OPENAI_BASE_URL": f"http://127.0.0.1:{stub_port}/v1",
+    })
+    try:
+        await wait_ready(f"http://127.0.0.1:{stub_port}/stats")
+        await wait_ready(f"http://127.0.0.1:{api_port}/")
+
+        limits = httpx.Limits(max_connections=args.chat_concurrency + args.predict_concurrency + 10)
+        async with httpx.AsyncClient(base_url=f"http://127.0.0.1:{api_port}", limits=limits, timeout=60) as client:
+            await measure_predict(client, 100, args.predict_concurrency)  # warm-up
+            baseline = await measure_predict(client, args.requests, args.predict_concurrency)
+
+            stop = asyncio.Event()
+            chat_task = asyncio.create_task(saturate_chat(client, args.chat_concurrency, stop))
+            await asyncio.sleep(args.upstream_latency / 2)  # let chat calls pile up upstream
+            loaded = await measure_predict(client, args.requests, args.predict_concurrency)
+            stop.set()
+            chat_completed = await chat_task
+
+        print("FieldScore AI - /chat Isolation Load Test\n")
+        print(f"Upstream latency: {args.upstream_latency:.1f} s, chat concurrency: {args.chat_concurrency}, "
+              f"chat requests completed during run: {chat_completed}\n")
+        baseline_p99 = summarize("/predict (idle)", baseline)
+        loaded_p99 = summarize("/predict (/chat saturated)", loaded)
+
+        ratio = loaded_p99 / baseline_p99
+        print(f"\np99 ratio: {ratio:.2f}x (limit {args.max_p99_ratio:.1f}x)")
+        return 0 if ratio <= args.max_p99_ratio else 1
+    finally:
+        api.terminate()
+        stub.terminate()
+        api.wait()
+        stub.wait()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--predict-concurrency", type=int, default=10)
+    parser.add_argument("--chat-concurrency", type=int, default=50)
+    parser.add_argument("--upstream-latency", type=float, default=5.0)
+    parser.add_argument("--max-p99-ratio", type=float, default=3.0)
+    sys.exit(asyncio.run(run(parser.parse_args())))
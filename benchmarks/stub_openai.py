@@ -0,0 +1,77 @@
+"""
+FieldScore AI - Local OpenAI Stub Server
+Minimal stand-in for the OpenAI chat completions API, used by the load tests
+and benchmarks so /chat can be exercised without network access or an API key.
+Requests with "stream": true get the reply token by token as SSE chunks.
+
+Run: STUB_LATENCY_S=2 uvicorn benchmarks.stub_openai:app --port 8099
+Then point the API at it: OPENAI_BASE_URL=http://127.0.0.1:8099/v1 OPENAI_API_KEY=stub
+"""
+
+import asyncio
+import json
+import os
+import re
+import time
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+# Simulated upstream generation time per completion
+STUB_LATENCY_S = float(os.getenv("STUB_LATENCY_S", "1.0"))
+
+STUB_REPLY = (
+    "FieldScore AI scores farm creditworthiness from Sentinel-2 NDVI trends, "
+    "rainfall deficit and soil data, returning a 0-100 risk score in minutes."
+)
+
+app = FastAPI(title="OpenAI stub")
+
+stats = {"requests": 0}
+
+def completion_payload(model: str, content: str) -> dict:
+    return {
+        "id": f"chatcmpl-stub-{stats['requests']}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop"
+        }],
+        "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0}
+    }
+
+def chunk_payload(model: str, delta: dict, finish_reason=None) -> dict:
+    return {
+        "id": f"chatcmpl-stub-{stats['requests']}",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}]
+    }
+
+async def completion_chunks(model: str, content: str):
+    """SSE chunks in the OpenAI streaming format, spread over STUB_LATENCY_S"""
+    tokens = re.findall(r"\S+\s*", content)
+    yield f"data: {json.dumps(chunk_payload(model, {'role': 'assistant', 'content': ''}))}\n\n"
+    for token in tokens:
+        await asyncio.sleep(STUB_LATENCY_S / len(tokens))
+        yield f"data: {json.dumps(chunk_payload(model, {'content': token}))}\n\n"
+    yield f"data: {json.dumps(chunk_payload(model, {}, finish_reason='stop'))}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    stats["requests"] += 1
+    model = body.get("model", "gpt-4o")
+    if body.get("stream"):
+        return StreamingResponse(completion_chunks(model, STUB_REPLY), media_type="text/event-stream")
+    await asyncio.sleep(STUB_LATENCY_S)
+    return completion_payload(model, STUB_REPLY)
+
+@app.get("/stats")
+async def get_stats():
+    return stats
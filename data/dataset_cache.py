@@ -0,0 +1,137 @@
+"""
+FieldScore AI - Training Dataset Cache
+Converts training_data.csv once into a columnar Parquet file with the compact
+dtypes declared in training_data_schema.json (float32 features, categorical
+crop_type), and serves column subsets from it until the CSV changes
+
+Prebuild the cache:
+    python data/dataset_cache.py [data/training_data.csv]
+"""
+
+import hashlib
+import json
+import os
+import sys
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+SCHEMA_PATH = 'data/training_data_schema.json'
+CACHE_DIR = 'data/.cache'
+# CSV rows parsed per chunk while building the cache (one Parquet row group each)
+CSV_CHUNK_ROWS = 250_000
+# Parquet metadata key holding the fingerprint of the CSV the cache was built from
+FINGERPRINT_KEY = b'fieldscore_source'
+# Part of the fingerprint; bumped when the conversion changes, so older caches are rebuilt
+CACHE_FORMAT = 2
+
+
+def load_column_types(schema_path: str = SCHEMA_PATH) -> dict:
+    """
+    Pandas dtype per column from the schema's column_types
+
+    Returns:
+        dict: Column name -> dtype; {"category": [...]} entries become a
+            CategoricalDtype with those (lowercase) categories in that order,
+            so category codes are stable across runs
+    """
+    with open(schema_path) as f:
+        column_types = json.load(f)['column_types']
+    return {
+        name: pd.CategoricalDtype(spec['category']) if isinstance(spec, dict) else spec
+        for name, spec in column_types.items()
+    }
+
+
+def default_cache_path(csv_path: str) -> str:
+    name = os.path.splitext(os.path.basename(csv_path))[0]
+    return os.path.join(CACHE_DIR, f'{name}.parquet')
+
+
+def source_fingerprint(csv_path: str, schema_path: str = SCHEMA_PATH) -> str:
+    """Identify a CSV version (size, mtime) and the column types it was cast to"""
+    stat = os.stat(csv_path)
+    with open(schema_path, 'rb') as f:
+        column_types = json.dumps(json.load(f)['column_types'], sort_keys=True)
+    digest = hashlib.sha256(column_types.encode()).hexdigest()[:16]
+    return f'{stat.st_size}:{stat.st_mtime_ns}:{digest}:v{CACHE_FORMAT}'
+
+
+def cache_is_fresh(cache_path: str, fingerprint: str) -> bool:
+    if not os.path.exists(cache_path):
+        return False
+    metadata = pq.read_schema(cache_path).metadata or {}
+    return metadata.get(FINGERPRINT_KEY) == fingerprint.encode()
+
+
+def build_cache(csv_path: str, cache_path: str = None, schema_path: str = SCHEMA_PATH) -> str:
+    """
+    Parse the CSV once with the schema dtypes and write it as Parquet
+
+    Categorical values are lowercased before they are matched against the
+    category list, as the feature schema and the API match them; values still
+    outside the list are stored as missing.
+
+    Returns:
+        str: Path of the written cache
+    """
+    cache_path = cache_path or default_cache_path(csv_path)
+    fingerprint = source_fingerprint(csv_path, schema_path)
+
+    os.makedirs(os.path.dirname(cache_path) or '.', exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    column_types = load_column_types(schema_path)
+    categorical = {name: dtype for name, dtype in column_types.items() if isinstance(dtype, pd.CategoricalDtype)}
+    writer = None
+    rows = 0
+    # One row group per CSV chunk, so neither the build nor chunked reads hold the whole file
+    for chunk in pd.read_csv(csv_path, dtype={**column_types, **dict.fromkeys(categorical, 'string')},
+                             chunksize=CSV_CHUNK_ROWS):
+        for name, dtype in categorical.items():
+            if name in chunk:
+                chunk[name] = chunk[name].str.lower().astype(dtype)
+        table = pa.Table.from_pandas(chunk, preserve_index=False)
+        if writer is None:
+            schema = table.schema.with_metadata({**(table.schema.metadata or {}), FINGERPRINT_KEY: fingerprint})
+            writer = pq.ParquetWriter(tmp_path, schema)
+        writer.write_table(table.cast(schema))
+        rows += len(chunk)
+    if writer is None:
+        raise ValueError(f"{csv_path} has no data rows")
+    writer.close()
+    os.replace(tmp_path, cache_path)
+    print(f"Cached {rows} rows from {csv_path} to {cache_path}")
+    return cache_path
+
+
+def ensure_cache(csv_path: str, schema_path: str = SCHEMA_PATH, cache_path: str = None) -> str:
+    """
+    Rebuild the cache if the CSV or the schema's column types changed
+
+    Returns:
+        str: Path of the up-to-date cache
+    """
+    cache_path = cache_path or default_cache_path(csv_path)
+    if not cache_is_fresh(cache_path, source_fingerprint(csv_path, schema_path)):
+        build_cache(csv_path, cache_path, schema_path)
+    return cache_path
+
+
+def read_dataset(csv_path: str, columns: list = None, schema_path: str = SCHEMA_PATH,
+                 cache_path: str = None) -> pd.DataFrame:
+    """
+    Load training data from the Parquet cache, rebuilding it if the CSV or the
+    schema's column types changed
+
+    Args:
+        columns: Only read these columns (default: all)
+
+    Returns:
+        pd.DataFrame: Data with the schema's compact dtypes
+    """
+    return pd.read_parquet(ensure_cache(csv_path, schema_path, cache_path), columns=columns)
+
+
+if __name__ == '__main__':
+    build_cache(sys.argv[1] if len(sys.argv) > 1 else 'data/training_data.csv')
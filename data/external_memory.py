@@ -0,0 +1,270 @@
+"""
+FieldScore AI - Out-of-Core Training
+Trains the risk models from the Parquet dataset cache one chunk at a time
+through an XGBoost data iterator, so the full history never has to fit in RAM
+
+XGBoost pulls the chunks through ParquetChunkIter (once to sketch the feature
+quantiles, once to bin the rows) and keeps the binned pages in an
+external-memory cache on disk, so only one chunk of raw rows is resident at a
+time. Rows are split into train/validation by a hash of their position in the
+dataset, so the split does not depend on the chunk size.
+
+Compare against the in-memory path:
+    python data/train_model.py --out-of-core --compare
+"""
+
+import json
+import os
+import resource
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+import xgboost as xgb
+
+from dataset_cache import CACHE_DIR, SCHEMA_PATH, ensure_cache, load_column_types
+from train_model import TRAINING_COLUMNS, prepare_features_target, save_model
+from tuning import MAX_BIN, TASKS
+
+CHUNK_ROWS = 100_000
+# Share of rows held out for early stopping and evaluation
+VALIDATION_PERCENT = 20
+EXTMEM_CACHE_DIR = os.path.join(CACHE_DIR, 'xgb')
+
+# Same settings as train_regression_model / train_classification_model
+BOOSTER_PARAMS = {
+    'max_depth': 6,
+    'learning_rate': 0.1,
+    'min_child_weight': 1,
+    'subsample': 0.8,
+    'colsample_bytree': 0.8,
+    'tree_method': 'hist',
+    'seed': 42
+}
+NUM_BOOST_ROUND = 100
+EARLY_STOPPING_ROUNDS = 10
+
+MODEL_PATHS = {
+    'regression': 'models/risk_score_regressor.pkl',
+    'classification': 'models/risk_category_classifier.pkl'
+}
+
+
+def validation_mask(start: int, n_rows: int, percent: int = VALIDATION_PERCENT) -> np.ndarray:
+    """True for rows start..start+n_rows-1 that belong to the validation split"""
+    index = np.arange(start, start + n_rows, dtype=np.uint64)
+    # Fibonacci hashing spreads consecutive row numbers evenly over 0..99
+    mixed = index * np.uint64(0x9E3779B97F4A7C15)
+    return (mixed >> np.uint64(40)) % np.uint64(100) < np.uint64(percent)
+
+
+def frame_arrays(df: pd.DataFrame, dtypes: dict) -> tuple:
+    """
+    Features and both targets of a slice of the dataset cache
+
+    Returns:
+        tuple: (X float32, risk_score float32, risk category code int32)
+    """
+    # Recode against the schema categories in case a chunk's dictionary differs
+    # (crop_type is recoded by the feature schema)
+    df['risk_category'] = df['risk_category'].astype(dtypes['risk_category'])
+    X, y, y_category, _ = prepare_features_target(df)
+    return X.to_numpy(np.float32), y.to_numpy(np.float32), y_category.to_numpy(np.int32)
+
+
+def iter_chunks(parquet_path: str, chunk_rows: int = CHUNK_ROWS, schema_path: str = SCHEMA_PATH):
+    """Yield (index of the first row, X, risk_score, risk category) per chunk of the cache"""
+    dtypes = load_column_types(schema_path)
+    start = 0
+    for batch in pq.ParquetFile(parquet_path).iter_batches(batch_size=chunk_rows, columns=TRAINING_COLUMNS):
+        X, y, y_category = frame_arrays(batch.to_pandas(), dtypes)
+        yield start, X, y, y_category
+        start += len(X)
+
+
+class ParquetChunkIter(xgb.DataIter):
+    """
+    Feeds one split of the dataset cache to XGBoost chunk by chunk
+
+    Args:
+        task: 'regression' (risk_score label) or 'classification' (risk category)
+        split: 'train' or 'valid'
+        cache_prefix: Path prefix of XGBoost's on-disk page cache
+    """
+
+    def __init__(self, parquet_path: str, task: str, split: str, chunk_rows: int = CHUNK_ROWS,
+                 cache_prefix: str = None):
+        self.parquet_path = parquet_path
+        self.task = task
+        self.split = split
+        self.chunk_rows = chunk_rows
+        self._chunks = None
+        super().__init__(cache_prefix=cache_prefix)
+
+    def next(self, input_data) -> bool:
+        if self._chunks is None:
+            self._chunks = iter_chunks(self.parquet_path, self.chunk_rows)
+        for start, X, y, y_category in self._chunks:
+            keep = validation_mask(start, len(X))
+            if self.split == 'train':
+                keep = ~keep
+            if keep.any():
+                label = y_category if self.task == 'classification' else y
+                input_data(data=X[keep], label=label[keep])
+                return True
+        return False
+
+    def reset(self):
+        self._chunks = None
+
+
+def external_matrices(parquet_path: str, task: str, chunk_rows: int = CHUNK_ROWS) -> tuple:
+    """(train, validation) matrices backed by XGBoost's external-memory page cache"""
+    os.makedirs(EXTMEM_CACHE_DIR, exist_ok=True)
+    iters = [ParquetChunkIter(parquet_path, task, split, chunk_rows,
+                              cache_prefix=os.path.join(EXTMEM_CACHE_DIR, f'{task}-{split}'))
+             for split in ('train', 'valid')]
+    if hasattr(xgb, 'ExtMemQuantileDMatrix'):
+        dtrain = xgb.ExtMemQuantileDMatrix(iters[0], max_bin=MAX_BIN)
+        return dtrain, xgb.ExtMemQuantileDMatrix(iters[1], ref=dtrain)
+    # XGBoost < 3.0: pages hold raw rows and hist bins them while training
+    return xgb.DMatrix(iters[0]), xgb.DMatrix(iters[1])
+
+
+def in_memory_matrices(parquet_path: str, task: str) -> tuple:
+    """The same split loaded at once, as the in-memory baseline"""
+    X, y, y_category = frame_arrays(pd.read_parquet(parquet_path, columns=TRAINING_COLUMNS),
+                                    load_column_types())
+    label = y_category if task == 'classification' else y
+    valid = validation_mask(0, len(X))
+    dtrain = xgb.QuantileDMatrix(X[~valid], label[~valid], max_bin=MAX_BIN)
+    return dtrain, xgb.QuantileDMatrix(X[valid], label[valid], ref=dtrain)
+
+
+def train_booster(dtrain, dvalid, task: str) -> xgb.Booster:
+    return xgb.train({**TASKS[task], **BOOSTER_PARAMS}, dtrain, num_boost_round=NUM_BOOST_ROUND,
+                     evals=[(dvalid, 'valid')], early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                     verbose_eval=False)
+
+
+def evaluate(booster: xgb.Booster, parquet_path: str, task: str, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Validation metrics of a booster, streamed over the held-out rows
+
+    Returns:
+        dict: {'rmse'} for regression, {'mlogloss', 'accuracy'} for classification
+    """
+    iteration_range = (0, booster.best_iteration + 1)
+    n_rows, squared_error, log_loss, correct = 0, 0.0, 0.0, 0
+    for start, X, y, y_category in iter_chunks(parquet_path, chunk_rows):
+        valid = validation_mask(start, len(X))
+        if not valid.any():
+            continue
+        predictions = booster.inplace_predict(X[valid], iteration_range=iteration_range)
+        n_rows += int(valid.sum())
+        if task == 'classification':
+            labels = y_category[valid]
+            probabilities = np.clip(predictions[np.arange(len(labels)), labels], 1e-15, 1)
+            log_loss -= float(np.log(probabilities).sum())
+            correct += int((predictions.argmax(axis=1) == labels).sum())
+        else:
+            squared_error += float(((predictions - y[valid]) ** 2).sum())
+
+    if task == 'classification':
+        return {'mlogloss': log_loss / n_rows, 'accuracy': correct / n_rows}
+    return {'rmse': float(np.sqrt(squared_error / n_rows))}
+
+
+def run_training(mode: str, parquet_path: str, task: str, chunk_rows: int = CHUNK_ROWS) -> dict:
+    """
+    Train and evaluate one model in 'out-of-core' or 'in-memory' mode
+
+    Run it in a fresh process to make its peak RSS meaningful.
+
+    Returns:
+        dict: Timing, memory and validation metrics, plus the booster as raw JSON
+    """
+    baseline_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    if mode == 'out-of-core':
+        dtrain, dvalid = external_matrices(parquet_path, task, chunk_rows)
+    else:
+        dtrain, dvalid = in_memory_matrices(parquet_path, task)
+    booster = train_booster(dtrain, dvalid, task)
+    seconds = time.perf_counter() - start
+    metrics = evaluate(booster, parquet_path, task, chunk_rows)
+    # ru_maxrss is in KiB on Linux
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'mode': mode,
+        'task': task,
+        'seconds': round(seconds, 3),
+        'rounds': booster.best_iteration + 1,
+        'baseline_rss_mb': round(baseline_rss / 1024, 1),
+        'peak_rss_mb': round(peak_rss / 1024, 1),
+        **{name: round(value, 4) for name, value in metrics.items()},
+        'booster': bytes(booster.save_raw('json'))
+    }
+
+
+def run_isolated(mode: str, parquet_path: str, task: str, chunk_rows: int) -> dict:
+    with ProcessPoolExecutor(1, mp_context=get_context('spawn')) as pool:
+        return pool.submit(run_training, mode, parquet_path, task, chunk_rows).result()
+
+
+def to_sklearn(raw_booster: bytes, task: str):
+    """Wrap a trained booster in the estimator type the API and train_model.py save"""
+    model = xgb.XGBClassifier() if task == 'classification' else xgb.XGBRegressor()
+    model.load_model(bytearray(raw_booster))
+    return model
+
+
+def print_report(results: list):
+    """Print the in-memory vs out-of-core comparison"""
+    print(f"\n{'task':<15} {'mode':<12} {'seconds':>8} {'peak MB':>8} {'rounds':>7}  metrics")
+    for result in results:
+        metrics = ', '.join(f"{name}={result[name]:.4f}" for name in ('rmse', 'mlogloss', 'accuracy')
+                            if name in result)
+        print(f"{result['task']:<15} {result['mode']:<12} {result['seconds']:>8.2f} "
+              f"{result['peak_rss_mb']:>8.1f} {result['rounds']:>7}  {metrics}")
+
+
+def train_models_out_of_core(csv_path: str = 'data/training_data.csv', chunk_rows: int = CHUNK_ROWS,
+                             compare: bool = False, report_path: str = 'models/out_of_core_report.json') -> dict:
+    """
+    Train and save both models out of core
+
+    Args:
+        chunk_rows: Rows per chunk read from the cache; bounds the raw data in memory
+        compare: Also train in memory, each run in its own process, and write a
+            report of time, peak memory and validation metrics of both paths
+
+    Returns:
+        dict: Task -> trained sklearn-wrapper model
+    """
+    parquet_path = ensure_cache(csv_path)
+    models, results = {}, []
+    for task in ('regression', 'classification'):
+        print(f"\n=== Training {task.title()} Model out of core ({chunk_rows} rows per chunk) ===")
+        if compare:
+            baseline = run_isolated('in-memory', parquet_path, task, chunk_rows)
+            result = run_isolated('out-of-core', parquet_path, task, chunk_rows)
+            results += [baseline, result]
+        else:
+            result = run_training('out-of-core', parquet_path, task, chunk_rows)
+        print(', '.join(f"{name}: {result[name]}" for name in ('rmse', 'mlogloss', 'accuracy', 'rounds', 'seconds')
+                        if name in result))
+        models[task] = to_sklearn(result['booster'], task)
+        save_model(models[task], MODEL_PATHS[task])
+
+    if compare:
+        print_report(results)
+        os.makedirs(os.path.dirname(report_path) or '.', exist_ok=True)
+        with open(report_path, 'w') as f:
+            json.dump({'chunk_rows': chunk_rows, 'rows': pq.ParquetFile(parquet_path).metadata.num_rows,
+                       'results': [{k: v for k, v in r.items() if k != 'booster'} for r in results]}, f, indent=2)
+        print(f"Comparison report saved to: {report_path}")
+    return models
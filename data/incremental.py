@@ -0,0 +1,153 @@
+"""
+FieldScore AI - Incremental Retraining
+Continues boosting the current regression and classification models on a
+batch of new loan outcomes instead of retraining over the whole history
+
+Part of the new rows is held out. Both the current and the updated models are
+scored on it, and the update is only kept if it is not worse by more than a
+tolerance. Otherwise the current models stay in place, or, when requested, both
+are retrained from scratch on history + new rows.
+"""
+
+import os
+import sys
+
+import joblib
+import numpy as np
+import pandas as pd
+import xgboost as xgb
+from sklearn.metrics import log_loss
+from sklearn.model_selection import train_test_split
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from model_registry import MODEL_REGISTRY_DIR, MANIFEST_NAME, publish
+from train_model import (
+    load_and_preprocess_data,
+    prepare_features_target,
+    save_model,
+    train_classification_model,
+    train_regression_model,
+)
+
+REGRESSOR_PATH = 'models/risk_score_regressor.pkl'
+CLASSIFIER_PATH = 'models/risk_category_classifier.pkl'
+
+# Boosting rounds added per incremental update
+INCREMENTAL_ROUNDS = 20
+HOLDOUT_FRACTION = 0.2
+# Relative holdout error increase tolerated before an update is rejected
+DEGRADATION_TOLERANCE = 0.05
+
+
+def regression_error(model, X, y) -> float:
+    """Holdout RMSE"""
+    return float(np.sqrt(np.mean((model.predict(X) - y) ** 2)))
+
+
+def classification_error(model, X, y) -> float:
+    """Holdout multi-class log loss"""
+    return float(log_loss(y, model.predict_proba(X), labels=[0, 1, 2]))
+
+
+def continue_boosting(model, X, y, rounds: int = INCREMENTAL_ROUNDS):
+    """
+    Add `rounds` trees fitted on X, y to a copy of a trained XGBoost model
+
+    A classifier keeps all of its classes even when y lacks some of them.
+
+    Returns:
+        The updated model (the original is left untouched)
+    """
+    booster = model.get_booster()
+    best_iteration = booster.attr('best_iteration')
+    if best_iteration is not None:
+        # Drop the trees early stopping discarded before adding new ones
+        booster = booster[:int(best_iteration) + 1]
+
+    if isinstance(model, xgb.XGBClassifier):
+        # The sklearn fit infers the classes from y, and a batch missing a risk
+        # category would be rejected; train on the booster with the full class count
+        booster = xgb.train(model.get_xgb_params() | {'num_class': model.n_classes_},
+                            xgb.DMatrix(X, y), num_boost_round=rounds, xgb_model=booster)
+        booster.set_attr(best_iteration=None, best_score=None)
+        updated = type(model)(**model.get_params())
+        updated.load_model(bytearray(booster.save_raw()))
+        return updated
+
+    updated = type(model)(**model.get_params())
+    # Early stopping would need a validation set; the holdout is kept for the comparison
+    updated.set_params(n_estimators=rounds, early_stopping_rounds=None)
+    updated.fit(X, y, xgb_model=booster, verbose=False)
+    # A carried-over best_iteration would make predict() ignore the new trees
+    updated.get_booster().set_attr(best_iteration=None, best_score=None)
+    return updated
+
+
+def update_models(new_csv: str, history_csv: str = 'data/training_data.csv',
+                  rounds: int = INCREMENTAL_ROUNDS, holdout: float = HOLDOUT_FRACTION,
+                  tolerance: float = DEGRADATION_TOLERANCE, full_retrain: bool = False,
+                  seed: int = 42) -> dict:
+    """
+    Warm-start both models on new rows, keeping them only if the holdout allows
+
+    Args:
+        new_csv: New loan outcomes, same columns as training_data.csv
+        history_csv: Full history, used only for a fallback full retrain
+        full_retrain: Retrain from scratch on history + new rows when an update degrades
+
+    Returns:
+        dict: Holdout errors before/after and the action taken per model
+    """
+    new_df, _, _ = load_and_preprocess_data(new_csv)
+    X_new, y_new, y_category_new, _ = prepare_features_target(new_df)
+    X_train, X_hold, y_train, y_hold, yc_train, yc_hold = train_test_split(
+        X_new, y_new, y_category_new, test_size=holdout, random_state=seed
+    )
+
+    results = {}
+    updated = {}
+    for name, path, target_train, target_hold, error in (
+            ('regressor', REGRESSOR_PATH, y_train, y_hold, regression_error),
+            ('classifier', CLASSIFIER_PATH, yc_train, yc_hold, classification_error)):
+        current = joblib.load(path)
+        candidate = continue_boosting(current, X_train, target_train, rounds)
+        before, after = error(current, X_hold, target_hold), error(candidate, X_hold, target_hold)
+        accepted = after <= before * (1 + tolerance)
+        results[name] = {'holdout_error_before': round(before, 4), 'holdout_error_after': round(after, 4),
+                         'action': 'updated' if accepted else 'rejected'}
+        print(f"{name}: holdout error {before:.4f} -> {after:.4f} ({results[name]['action']})")
+        if accepted:
+            updated[name] = candidate
+
+    if len(updated) < len(results) and full_retrain:
+        print("\nIncremental update degraded the holdout; retraining from scratch on history + new rows")
+        history_df, _, _ = load_and_preprocess_data(history_csv)
+        X, y, y_category, _ = prepare_features_target(pd.concat([history_df, new_df], ignore_index=True))
+        updated['regressor'] = train_regression_model(X, y)[0]
+        updated['classifier'] = train_classification_model(X, y_category)[0]
+        for name in results:
+            results[name]['action'] = 'retrained'
+
+    if 'regressor' in updated:
+        save_model(updated['regressor'], REGRESSOR_PATH)
+        publish_regressor(results, len(new_df), new_csv)
+    if 'classifier' in updated:
+        save_model(updated['classifier'], CLASSIFIER_PATH)
+    return results
+
+
+def publish_regressor(results: dict, new_rows: int, new_csv: str):
+    """
+    Publish the saved regressor as a new registry version when the API serves
+    from the registry; otherwise it picks up the rewritten legacy artifact
+    """
+    if not os.path.exists(os.path.join(MODEL_REGISTRY_DIR, MANIFEST_NAME)):
+        return
+    version = publish(REGRESSOR_PATH, MODEL_REGISTRY_DIR, metadata={
+        **results['regressor'],
+        'new_rows': new_rows,
+        'new_rows_source': os.path.abspath(new_csv)
+    })
+    print(f"Published regressor as registry version {version}")
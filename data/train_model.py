@@ -5,54 +5,78 @@ Example implementation for training the gradient boosting risk scoring model
 
 import pandas as pd
 import numpy as np
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import LabelEncoder
+from sklearn.model_selection import train_test_split
 from sklearn.metrics import roc_auc_score, classification_report, confusion_matrix
 import xgboost as xgb
 import joblib
-import json
+import argparse
+import os
+import sys
 
-def load_and_preprocess_data(csv_path='data/training_data.csv'):
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from dataset_cache import read_dataset
+from feature_schema import FEATURE_SCHEMA, schema_path_for
+
+# Columns read from the dataset cache for training (crop_type is encoded by FEATURE_SCHEMA)
+TRAINING_COLUMNS = [
+    'farm_area_hectares',
+    'ndvi_mean_12mo',
+    'ndvi_slope',
+    'ndvi_14day_delta',
+    'ndvi_anomaly_zscore',
+    'rainfall_deficit_30day',
+    'coefficient_of_variation',
+    'soil_organic_carbon',
+    'crop_type',
+    'loan_amount_usd',
+    'loan_outcome',
+    'risk_score',
+    'risk_category'
+]
+
+def load_and_preprocess_data(csv_path='data/training_data.csv', columns=TRAINING_COLUMNS):
     """
     Load and preprocess the training data
+    
+    Reads the Parquet cache of the CSV (rebuilt when the CSV changes), with the
+    compact dtypes from training_data_schema.json. crop_type and loan_outcome
+    are categoricals with fixed category lists, so their codes are the encoding;
+    crop codes are FEATURE_SCHEMA's, which the API encodes requests with.
+    
+    Returns:
+        tuple: (df, crop_encoding, outcome_encoding), encodings as {label: code}
     """
-    df = pd.read_csv(csv_path)
+    df = read_dataset(csv_path, columns=columns)
     
     # Encode categorical variables
-    le_crop = LabelEncoder()
-    df['crop_type_encoded'] = le_crop.fit_transform(df['crop_type'])
+    unknown_crops = int((df['crop_type'].cat.codes < 0).sum())
+    if unknown_crops:
+        print(f"⚠ {unknown_crops} rows have a crop_type missing from the schema "
+              f"(encoded as {FEATURE_SCHEMA.unknown_code}, like the API does)")
+    crop_encoding = FEATURE_SCHEMA.codes['crop_type']
     
-    le_outcome = LabelEncoder()
-    df['loan_outcome_encoded'] = le_outcome.fit_transform(df['loan_outcome'])
+    df['loan_outcome_encoded'] = df['loan_outcome'].cat.codes
+    outcome_encoding = {outcome: code for code, outcome in enumerate(df['loan_outcome'].cat.categories)}
     
     print(f"Loaded {len(df)} training samples")
     print(f"Features: {df.columns.tolist()}")
     
-    return df, le_crop, le_outcome
+    return df, crop_encoding, outcome_encoding
 
-def prepare_features_target(df):
+def prepare_features_target(df, schema=FEATURE_SCHEMA):
     """
     Separate features and target variable
+    
+    Features are encoded by the shared feature schema into one float32 matrix,
+    in the same column order and with the same crop codes the API uses.
     """
-    # Feature columns for model training
-    feature_cols = [
-        'farm_area_hectares',
-        'ndvi_mean_12mo',
-        'ndvi_slope',
-        'ndvi_14day_delta',
-        'ndvi_anomaly_zscore',
-        'rainfall_deficit_30day',
-        'coefficient_of_variation',
-        'soil_organic_carbon',
-        'crop_type_encoded',
-        'loan_amount_usd'
-    ]
-    
-    X = df[feature_cols]
+    feature_cols = schema.columns
+    X = pd.DataFrame(schema.encode_frame(df), columns=feature_cols, index=df.index)
     y = df['risk_score']  # Continuous target (0-100)
     
     # For classification, convert to risk categories
-    y_category = df['risk_category'].map({'high': 0, 'medium': 1, 'low': 2})
+    y_category = df['risk_category'].map({'high': 0, 'medium': 1, 'low': 2}).astype(int)
     
     return X, y, y_category, feature_cols
 
@@ -75,14 +99,14 @@ def train_regression_model(X, y):
         subsample=0.8,
         colsample_bytree=0.8,
         random_state=42,
-        objective='reg:squarederror'
+        objective='reg:squarederror',
+        early_stopping_rounds=10
     )
     
     # Train model
     model.fit(
         X_train, y_train,
         eval_set=[(X_test, y_test)],
-        early_stopping_rounds=10,
         verbose=False
     )
     
@@ -121,14 +145,14 @@ def train_classification_model(X, y_category):
         colsample_bytree=0.8,
         random_state=42,
         objective='multi:softprob',
-        num_class=3
+        num_class=3,
+        early_stopping_rounds=10
     )
     
     # Train model
     model.fit(
         X_train, y_train,
         eval_set=[(X_test, y_test)],
-        early_stopping_rounds=10,
         verbose=False
     )
     
@@ -167,13 +191,17 @@ def get_feature_importance(model, feature_names):
     
     return feature_importance
 
-def save_model(model, model_path='models/fieldscore_model.pkl'):
+def save_model(model, model_path='models/fieldscore_model.pkl', schema=FEATURE_SCHEMA):
     """
-    Save trained model to disk
+    Save trained model to disk, with the feature schema it was trained on
+    (feature_schema.json in the same directory)
     """
-    import os
     os.makedirs(os.path.dirname(model_path), exist_ok=True)
-    joblib.dump(model, model_path)
+    schema.save(schema_path_for(model_path))
+    # Write then rename, so an API watching the file never loads a partial artifact
+    tmp_path = model_path + '.tmp'
+    joblib.dump(model, tmp_path)
+    os.replace(tmp_path, model_path)
     print(f"\nModel saved to: {model_path}")
 
 def predict_risk_score(model, sample_features):
@@ -199,32 +227,82 @@ def predict_risk_score(model, sample_features):
         'recommendation': recommendation
     }
 
+def tune_models(X, y, y_category, n_iter=None, n_folds=5, workers=None):
+    """
+    Tune both models with parallel k-fold CV (see tuning.py)
+    
+    Returns:
+        tuple: (regression model, classification model), refitted on all rows
+    """
+    from tuning import print_report, save_report, tune
+    
+    models = []
+    for task, target in (('regression', y), ('classification', y_category)):
+        print(f"\n=== Tuning {task.title()} Model ===")
+        model, reports = tune(X, target, task, n_iter=n_iter, n_folds=n_folds, workers=workers)
+        print_report(reports)
+        save_report(reports, f'models/tuning_report_{task}.json')
+        models.append(model)
+    return tuple(models)
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train the FieldScore AI risk models")
+    parser.add_argument("--tune", action="store_true",
+                        help="Search hyperparameters with parallel k-fold CV instead of the fixed set")
+    parser.add_argument("--n-iter", type=int, help="Random search: sample this many candidates from the grid")
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--workers", type=int, help="Tuning processes (default: CPU count)")
+    parser.add_argument("--incremental", metavar="NEW_CSV",
+                        help="Continue boosting the saved models on these new loan outcomes only")
+    parser.add_argument("--rounds", type=int, default=20, help="Trees added by an incremental update")
+    parser.add_argument("--full-retrain-on-degradation", action="store_true",
+                        help="Retrain from scratch if an incremental update worsens the holdout")
+    parser.add_argument("--out-of-core", action="store_true",
+                        help="Stream the dataset cache in chunks through XGBoost external memory")
+    parser.add_argument("--chunk-rows", type=int, default=100_000, help="Rows per chunk for --out-of-core")
+    parser.add_argument("--compare", action="store_true",
+                        help="With --out-of-core: also train in memory and report time, memory and accuracy")
+    args = parser.parse_args()
+    
     print("FieldScore AI - Model Training Pipeline\n")
     print("=" * 60)
     
+    if args.incremental:
+        from incremental import update_models
+        
+        update_models(args.incremental, rounds=args.rounds, full_retrain=args.full_retrain_on_degradation)
+        print("\n✓ Incremental update complete!")
+        raise SystemExit(0)
+    
+    if args.out_of_core:
+        from external_memory import train_models_out_of_core
+        
+        train_models_out_of_core(chunk_rows=args.chunk_rows, compare=args.compare)
+        print("\n✓ Out-of-core training complete!")
+        raise SystemExit(0)
+    
     # Load data
-    df, le_crop, le_outcome = load_and_preprocess_data()
+    df, crop_encoding, outcome_encoding = load_and_preprocess_data()
     
     # Prepare features and targets
     X, y, y_category, feature_cols = prepare_features_target(df)
     
-    # Train regression model (for continuous risk score)
-    reg_model, X_test_reg, y_test_reg, pred_reg = train_regression_model(X, y)
-    
-    # Train classification model (for risk categories)
-    clf_model, X_test_clf, y_test_clf, pred_clf, pred_proba = train_classification_model(X, y_category)
+    if args.tune:
+        reg_model, clf_model = tune_models(X, y, y_category, args.n_iter, args.folds, args.workers)
+    else:
+        # Train regression model (for continuous risk score)
+        reg_model, X_test_reg, y_test_reg, pred_reg = train_regression_model(X, y)
+        
+        # Train classification model (for risk categories)
+        clf_model, X_test_clf, y_test_clf, pred_clf, pred_proba = train_classification_model(X, y_category)
     
     # Feature importance
     importance_df = get_feature_importance(reg_model, feature_cols)
     
-    # Save models
+    # Save models (and models/feature_schema.json, the encoding used for training)
     save_model(reg_model, 'models/risk_score_regressor.pkl')
     save_model(clf_model, 'models/risk_category_classifier.pkl')
     
-    # Save label encoders
-    joblib.dump(le_crop, 'models/crop_encoder.pkl')
-    
     # Example prediction
     print("\n" + "=" * 60)
     print("Example Prediction:")
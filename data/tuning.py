@@ -0,0 +1,212 @@
+"""
+FieldScore AI - Hyperparameter Search
+K-fold cross-validated grid or random search over XGBoost parameters, run in
+a process pool
+
+Each worker builds the binned (hist) QuantileDMatrix of every fold once and
+reuses it for all the trials it runs, uses a bounded number of threads so the
+pool does not oversubscribe the cores, and abandons a trial once its running
+CV score over the folds it has finished is clearly worse than the best finished
+trial's score over those same folds.
+"""
+
+import itertools
+import json
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+import xgboost as xgb
+from sklearn.model_selection import KFold, StratifiedKFold
+
+PARAM_GRID = {
+    'max_depth': [3, 4, 6],
+    'learning_rate': [0.05, 0.1, 0.2],
+    'min_child_weight': [1, 3],
+    'subsample': [0.8, 1.0],
+    'colsample_bytree': [0.8, 1.0]
+}
+
+MAX_ROUNDS = 500
+EARLY_STOPPING_ROUNDS = 10
+MAX_BIN = 256
+# A trial is pruned once the mean of its first k fold scores is this much worse
+# than the best finished trial's mean over the same k folds (comparing the same
+# folds cancels out folds that are hard for every configuration)
+PRUNE_TOLERANCE = 0.10
+# Folds a trial always completes before it can be pruned, so one unlucky fold
+# cannot drop it
+PRUNE_MIN_FOLDS = 2
+
+TASKS = {
+    'regression': {'objective': 'reg:squarederror', 'eval_metric': 'rmse'},
+    'classification': {'objective': 'multi:softprob', 'eval_metric': 'mlogloss', 'num_class': 3}
+}
+
+# Per-worker state, set by _init_worker
+_worker = {}
+
+
+def param_candidates(param_grid: dict = None, n_iter: int = None, seed: int = 42) -> list:
+    """
+    Expand a grid into parameter sets, or sample n_iter of them (random search)
+    """
+    param_grid = param_grid or PARAM_GRID
+    names = sorted(param_grid)
+    candidates = [dict(zip(names, values)) for values in itertools.product(*(param_grid[n] for n in names))]
+    if n_iter is not None and n_iter < len(candidates):
+        candidates = random.Random(seed).sample(candidates, n_iter)
+    return candidates
+
+
+def make_folds(y: np.ndarray, task: str, n_folds: int = 5, seed: int = 42) -> list:
+    """(train indices, validation indices) per fold; stratified for classification"""
+    splitter = (StratifiedKFold if task == 'classification' else KFold)(n_folds, shuffle=True, random_state=seed)
+    return list(splitter.split(np.zeros(len(y)), y))
+
+
+def _init_worker(X, y, folds, nthread, best_fold_scores):
+    _worker.update(X=X, y=y, folds=folds, nthread=nthread, best_fold_scores=best_fold_scores, matrices={})
+
+
+def _fold_matrices(max_bin: int) -> list:
+    # Binned train/validation matrices per fold, built once per worker and max_bin
+    if max_bin not in _worker['matrices']:
+        X, y = _worker['X'], _worker['y']
+        matrices = []
+        for train_idx, valid_idx in _worker['folds']:
+            dtrain = xgb.QuantileDMatrix(X[train_idx], y[train_idx], max_bin=max_bin, nthread=_worker['nthread'])
+            dvalid = xgb.QuantileDMatrix(X[valid_idx], y[valid_idx], ref=dtrain, nthread=_worker['nthread'])
+            matrices.append((dtrain, dvalid))
+        _worker['matrices'][max_bin] = matrices
+    return _worker['matrices'][max_bin]
+
+
+def run_trial(trial_id: int, params: dict, task: str, seed: int = 42) -> dict:
+    """
+    Cross-validate one parameter set (runs in a pool worker)
+
+    Returns:
+        dict: Trial report with status 'ok', 'pruned' or 'failed', the mean CV
+            score, rounds chosen by early stopping and wall time per fold. A
+            pruned trial has partial_score (mean of its finished folds) and
+            pruned_against (the best trial's mean over the same folds) instead
+            of score.
+    """
+    start = time.perf_counter()
+    report = {'trial': trial_id, 'params': params, 'status': 'ok', 'fold_scores': [],
+              'fold_rounds': [], 'fold_seconds': []}
+    booster_params = {**TASKS[task], **params, 'tree_method': 'hist', 'nthread': _worker['nthread'], 'seed': seed}
+    max_bin = booster_params.pop('max_bin', MAX_BIN)
+    try:
+        for dtrain, dvalid in _fold_matrices(max_bin):
+            fold_start = time.perf_counter()
+            booster = xgb.train(
+                booster_params, dtrain, num_boost_round=MAX_ROUNDS,
+                evals=[(dvalid, 'valid')], early_stopping_rounds=EARLY_STOPPING_ROUNDS,
+                verbose_eval=False
+            )
+            report['fold_scores'].append(float(booster.best_score))
+            report['fold_rounds'].append(int(booster.best_iteration) + 1)
+            report['fold_seconds'].append(round(time.perf_counter() - fold_start, 4))
+
+            n_done = len(report['fold_scores'])
+            if n_done >= PRUNE_MIN_FOLDS:
+                best_fold_scores = _worker['best_fold_scores']
+                with best_fold_scores.get_lock():
+                    reference = float(np.mean(best_fold_scores[:n_done]))
+                partial = float(np.mean(report['fold_scores']))
+                # reference is inf until a trial finishes
+                if partial > reference * (1 + PRUNE_TOLERANCE):
+                    report.update(status='pruned', partial_score=partial, pruned_against=reference)
+                    break
+    except xgb.core.XGBoostError as e:
+        report.update(status='failed', error=str(e))
+
+    if report['fold_scores'] and report['status'] != 'pruned':
+        report['score'] = float(np.mean(report['fold_scores']))
+        report['score_std'] = float(np.std(report['fold_scores']))
+    report['seconds'] = round(time.perf_counter() - start, 4)
+    return report
+
+
+def tune(X, y, task: str = 'regression', param_grid: dict = None, n_iter: int = None,
+         n_folds: int = 5, workers: int = None, seed: int = 42) -> tuple:
+    """
+    Search parameters with k-fold CV in a process pool and refit the best
+
+    Args:
+        X, y: Training features and target (y_category for classification)
+        task: 'regression' (RMSE) or 'classification' (multi-class log loss)
+        param_grid: Lists of values per XGBoost parameter (default PARAM_GRID)
+        n_iter: Sample this many candidates instead of the full grid
+        workers: Pool size (default: CPU count, at most the number of candidates)
+
+    Returns:
+        tuple: (best model refitted on all rows, trial reports sorted by score)
+    """
+    X = np.ascontiguousarray(X, dtype=np.float32)
+    y = np.asarray(y)
+    candidates = param_candidates(param_grid, n_iter, seed)
+    folds = make_folds(y, task, n_folds, seed)
+
+    cpus = os.cpu_count() or 1
+    workers = max(1, min(workers or cpus, len(candidates)))
+    nthread = max(1, cpus // workers)
+    print(f"Tuning {task}: {len(candidates)} candidates x {n_folds} folds, "
+          f"{workers} workers x {nthread} threads")
+
+    ctx = get_context('spawn')
+    # Fold scores of the best finished trial, read by workers to prune
+    best_fold_scores = ctx.Array('d', [float('inf')] * len(folds))
+    reports = []
+    with ProcessPoolExecutor(workers, mp_context=ctx, initializer=_init_worker,
+                             initargs=(X, y, folds, nthread, best_fold_scores)) as pool:
+        futures = [pool.submit(run_trial, i, params, task, seed) for i, params in enumerate(candidates)]
+        for future in as_completed(futures):
+            report = future.result()
+            reports.append(report)
+            if report['status'] == 'ok':
+                with best_fold_scores.get_lock():
+                    if report['score'] < np.mean(best_fold_scores[:]):
+                        best_fold_scores[:] = report['fold_scores']
+
+    reports.sort(key=lambda r: (r['status'] != 'ok', r.get('score', r.get('partial_score', float('inf')))))
+    best = reports[0]
+    if best['status'] != 'ok':
+        raise RuntimeError("Every tuning trial failed")
+
+    model_cls = xgb.XGBClassifier if task == 'classification' else xgb.XGBRegressor
+    task_params = {k: v for k, v in TASKS[task].items() if k != 'num_class'}
+    model = model_cls(
+        **task_params, **best['params'], n_estimators=int(np.mean(best['fold_rounds'])),
+        tree_method='hist', random_state=seed
+    )
+    model.fit(X, y)
+    return model, reports
+
+
+def print_report(reports: list, limit: int = 10):
+    """Print the best trials with their timing; pruned trials show their partial score"""
+    print(f"\n{'trial':>5} {'status':>7} {'score':>9} {'± std':>8} {'rounds':>7} {'seconds':>8}  params")
+    for report in reports[:limit]:
+        score = report.get('score', report.get('partial_score'))
+        score = f"{score:.4f}" if score is not None else '-'
+        std = f"{report['score_std']:.4f}" if 'score_std' in report else '-'
+        rounds = int(np.mean(report['fold_rounds'])) if report['fold_rounds'] else '-'
+        print(f"{report['trial']:>5} {report['status']:>7} {score:>9} {std:>8} {rounds:>7} "
+              f"{report['seconds']:>8.2f}  {report['params']}")
+    counts = {status: sum(r['status'] == status for r in reports) for status in ('ok', 'pruned', 'failed')}
+    total = sum(r['seconds'] for r in reports)
+    print(f"{counts['ok']} completed, {counts['pruned']} pruned, {counts['failed']} failed; "
+          f"{total:.1f} s of trial time")
+
+
+def save_report(reports: list, path: str):
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    with open(path, 'w') as f:
+        json.dump(reports, f, indent=2)
+    print(f"Tuning report saved to: {path}")
@@ -0,0 +1,335 @@
+"""
+FieldScore AI - Geospatial Feature Provider
+Derives a farm's NDVI, rainfall and soil features from its coordinates through
+pluggable upstream sources (Sentinel-2, ERA5, SoilGrids), with a geohash-keyed
+tile cache so neighbouring farms in the same cell share one fetch
+
+Each source covers the globe with geohash tiles at its own precision, chosen to
+match its native resolution, and returns the features it supplies per tile.
+
+Local stand-in: one JSON file per source in FEATURE_TILES_DIR
+    {"precision": 7, "tiles": {"kzf0t8w": {"ndvi_mean_12mo": 0.72, ...}, ...}}
+"""
+
+import asyncio
+import glob
+import json
+import math
+import os
+
+from cache import TTLCache
+from rainfall_deficit import RainfallDeficitEngine
+
+# Directory of file-backed tile sources
+FEATURE_TILES_DIR = os.getenv("FEATURE_TILES_DIR")
+# State directory of the rolling rainfall deficit engine (see rainfall_deficit.py)
+RAINFALL_STATE_DIR = os.getenv("RAINFALL_STATE_DIR")
+FEATURE_CACHE_SIZE = int(os.getenv("FEATURE_CACHE_SIZE", "100000"))
+FEATURE_CACHE_TTL_S = float(os.getenv("FEATURE_CACHE_TTL_S", "86400"))
+
+# FarmInput fields the provider fills in from the farm's location
+LOCATION_FEATURES = [
+    'ndvi_mean_12mo',
+    'ndvi_slope',
+    'ndvi_14day_delta',
+    'ndvi_anomaly_zscore',
+    'rainfall_deficit_30day',
+    'coefficient_of_variation',
+    'soil_organic_carbon'
+]
+
+GEOHASH_ALPHABET = "0123456789bcdefghjkmnpqrstuvwxyz"
+
+
+def geohash(latitude: float, longitude: float, precision: int) -> str:
+    """
+    Encode a coordinate as a geohash of `precision` characters
+
+    Precision 4 is a ~39 x 20 km cell, 6 is ~1.2 x 0.6 km, 8 is ~38 x 19 m.
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    chars = []
+    bits = 0
+    value = 0
+    even = True
+    while len(chars) < precision:
+        if even:
+            mid = (lon_range[0] + lon_range[1]) / 2
+            if longitude >= mid:
+                value = value * 2 + 1
+                lon_range[0] = mid
+            else:
+                value *= 2
+                lon_range[1] = mid
+        else:
+            mid = (lat_range[0] + lat_range[1]) / 2
+            if latitude >= mid:
+                value = value * 2 + 1
+                lat_range[0] = mid
+            else:
+                value *= 2
+                lat_range[1] = mid
+        even = not even
+        bits += 1
+        if bits == 5:
+            chars.append(GEOHASH_ALPHABET[value])
+            bits = 0
+            value = 0
+    return "".join(chars)
+
+
+def geohash_center(tile: str) -> tuple:
+    """
+    Decode a geohash to the (latitude, longitude) of its cell centre
+    """
+    lat_range = [-90.0, 90.0]
+    lon_range = [-180.0, 180.0]
+    even = True
+    for char in tile:
+        value = GEOHASH_ALPHABET.index(char)
+        for bit in (16, 8, 4, 2, 1):
+            bounds = lon_range if even else lat_range
+            mid = (bounds[0] + bounds[1]) / 2
+            if value & bit:
+                bounds[0] = mid
+            else:
+                bounds[1] = mid
+            even = not even
+    return (lat_range[0] + lat_range[1]) / 2, (lon_range[0] + lon_range[1]) / 2
+
+
+class FeatureSource:
+    """
+    Upstream supplying features per geohash tile
+
+    Subclasses set name and precision and implement fetch. fetch is blocking
+    and is run on a worker thread; it receives every uncached tile a request
+    needs at once, so bulk APIs can serve them in a single call.
+    """
+
+    name = None
+    precision = 6
+
+    def version(self):
+        """
+        Token of the data the source currently serves, part of the tile cache
+        key; sources whose data changes in place return a new token after each
+        change, so tiles cached before it are not served again
+
+        Returns:
+            Hashable token, or None for sources that only expire by TTL
+        """
+        return None
+
+    def fetch(self, tiles: list) -> dict:
+        """
+        Returns:
+            dict: Feature dict per tile; tiles without data may be omitted
+        """
+        raise NotImplementedError
+
+
+class FileFeatureSource(FeatureSource):
+    """
+    File-backed stand-in for an upstream, read from a JSON tile file
+
+    The file is loaded on first fetch and re-read when its mtime changes.
+    """
+
+    def __init__(self, path: str, name: str = None):
+        self.path = path
+        self.name = name or os.path.splitext(os.path.basename(path))[0]
+        with open(path) as f:
+            self.precision = int(json.load(f)["precision"])
+        self._tiles = None
+        self._mtime = None
+
+    def fetch(self, tiles: list) -> dict:
+        mtime = os.stat(self.path).st_mtime_ns
+        if self._tiles is None or mtime != self._mtime:
+            with open(self.path) as f:
+                data = json.load(f)
+            self._tiles, self._mtime = data["tiles"], mtime
+        return {tile: self._tiles[tile] for tile in tiles if tile in self._tiles}
+
+
+class RainfallDeficitSource(FeatureSource):
+    """
+    rainfall_deficit_30day from a RainfallDeficitEngine state directory
+
+    Tiles are looked up at their centre; precision 5 (~5 km) keeps each tile
+    inside one 0.25 deg ERA5 cell.
+    """
+
+    name = "rainfall_deficit"
+
+    def __init__(self, engine: RainfallDeficitEngine, precision: int = 5):
+        self.engine = engine
+        self.precision = precision
+
+    def version(self):
+        """The engine's last date, so tiles are looked up again after each nightly update"""
+        self.engine.refresh()
+        return self.engine.meta["last_date"]
+
+    def fetch(self, tiles: list) -> dict:
+        centers = [geohash_center(tile) for tile in tiles]
+        deficits = self.engine.lookup([lat for lat, _ in centers], [lon for _, lon in centers])
+        return {
+            tile: {"rainfall_deficit_30day": float(deficit)}
+            for tile, deficit in zip(tiles, deficits.tolist())
+            if not math.isnan(deficit)
+        }
+
+
+class FeatureProvider:
+    """
+    Resolve location features for farms through a shared tile cache
+
+    Tiles are cached per (source, source version, geohash), including tiles the
+    upstream had no data for. Concurrent lookups of a tile that is already being fetched wait
+    for that fetch instead of starting another.
+
+    Args:
+        sources: FeatureSource instances, consulted in order (earlier sources
+            win when two supply the same feature)
+        cache_size: Maximum number of cached tiles
+        cache_ttl: Seconds before a cached tile is fetched again
+    """
+
+    def __init__(self, sources: list, cache_size: int = 100000, cache_ttl: float = 86400):
+        self.sources = list(sources)
+        self.cache = TTLCache(maxsize=cache_size, ttl=cache_ttl)
+        self.upstream_fetches = 0
+        self.tiles_fetched = 0
+        self.coalesced = 0
+        self._inflight = {}
+
+    async def _source_tiles(self, source: FeatureSource, tiles: set) -> dict:
+        # Serve tiles from the cache, join fetches already in flight, and fetch
+        # the rest from the upstream in one call
+        version = source.version()
+        found, waiting, missing = {}, {}, []
+        for tile in tiles:
+            key = (source.name, version, tile)
+            cached = self.cache.get(key)
+            if cached is not None:
+                found[tile] = cached
+            elif key in self._inflight:
+                waiting[tile] = self._inflight[key]
+            else:
+                missing.append(tile)
+
+        if missing:
+            future = asyncio.get_running_loop().create_future()
+            for tile in missing:
+                self._inflight[(source.name, version, tile)] = future
+            try:
+                self.upstream_fetches += 1
+                fetched = await asyncio.to_thread(source.fetch, missing)
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                # Mark retrieved so an exception nobody else awaited is not logged
+                future.exception()
+                raise
+            else:
+                self.tiles_fetched += len(missing)
+                for tile in missing:
+                    features = fetched.get(tile, {})
+                    self.cache.set((source.name, version, tile), features)
+                    found[tile] = features
+                future.set_result(found)
+            finally:
+                for tile in missing:
+                    del self._inflight[(source.name, version, tile)]
+
+        for tile, pending in waiting.items():
+            self.coalesced += 1
+            try:
+                found[tile] = (await asyncio.shield(pending)).get(tile, {})
+            except asyncio.CancelledError:
+                # The fetching request was cancelled (e.g. its client went away), not us
+                if not pending.cancelled():
+                    raise
+                found.update(await self._source_tiles(source, {tile}))
+        return found
+
+    async def prefetch(self, coordinates: list) -> list:
+        """
+        Resolve features for many farms, fetching each uncached tile once
+
+        Args:
+            coordinates: (latitude, longitude) pairs
+
+        Returns:
+            list: Dict of the location features found for each coordinate
+        """
+        per_source = [
+            [geohash(lat, lon, source.precision) for lat, lon in coordinates]
+            for source in self.sources
+        ]
+        tile_features = await asyncio.gather(*(
+            self._source_tiles(source, set(tiles))
+            for source, tiles in zip(self.sources, per_source)
+        ))
+
+        results = []
+        for i in range(len(coordinates)):
+            features = {}
+            for tiles, found in zip(reversed(per_source), reversed(tile_features)):
+                features.update(found[tiles[i]])
+            results.append({name: features[name] for name in LOCATION_FEATURES if name in features})
+        return results
+
+    async def features(self, latitude: float, longitude: float) -> dict:
+        """
+        Location features for one farm
+
+        Raises:
+            LookupError: If any of LOCATION_FEATURES has no data for the location
+        """
+        features = (await self.prefetch([(latitude, longitude)]))[0]
+        missing = [name for name in LOCATION_FEATURES if name not in features]
+        if missing:
+            raise LookupError(f"No data at ({latitude}, {longitude}) for: {', '.join(missing)}")
+        return features
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Tile cache counters, upstream fetch calls and tiles fetched
+        """
+        return {
+            "cache": self.cache.stats(),
+            "sources": {source.name: source.precision for source in self.sources},
+            "upstream_fetches": self.upstream_fetches,
+            "tiles_fetched": self.tiles_fetched,
+            "coalesced": self.coalesced
+        }
+
+
+def create_feature_provider():
+    """
+    Build a provider over the rainfall engine in RAINFALL_STATE_DIR (first, so
+    its live deficits win) and the tile files in FEATURE_TILES_DIR
+
+    Returns:
+        FeatureProvider, or None when neither is configured
+    """
+    sources = []
+    if RAINFALL_STATE_DIR:
+        sources.append(RainfallDeficitSource(RainfallDeficitEngine(RAINFALL_STATE_DIR)))
+    if FEATURE_TILES_DIR:
+        paths = sorted(glob.glob(os.path.join(FEATURE_TILES_DIR, "*.json")))
+        sources.extend(FileFeatureSource(path) for path in paths)
+    if not sources:
+        return None
+    return FeatureProvider(
+        sources,
+        cache_size=FEATURE_CACHE_SIZE,
+        cache_ttl=FEATURE_CACHE_TTL_S
+    )
@@ -0,0 +1,208 @@
+"""
+FieldScore AI - Compiled Feature Schema
+The model's feature order and categorical encodings, defined once in
+data/training_data_schema.json and shared by training and serving. Records,
+batches and DataFrames are encoded straight into contiguous float32 matrices,
+the dtype the training data is stored in and XGBoost scores in. The API encodes
+requests as float64 instead (SCORING_DTYPE), so the rule-based engine and the
+feature interpretations see the submitted values rather than their float32
+roundings.
+
+A trained model's schema is saved next to its artifact as feature_schema.json,
+so the API encodes requests exactly as that model's training data was encoded.
+"""
+
+import json
+import os
+from operator import attrgetter
+
+import numpy as np
+
+SCHEMA_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data', 'training_data_schema.json')
+# Written next to each model artifact (models/, registry version directories)
+FEATURE_SCHEMA_FILENAME = 'feature_schema.json'
+
+# A "<field>_encoded" feature holds the index of <field> in its category list
+ENCODED_SUFFIX = '_encoded'
+# Code for values missing from the category list (the API has always scored
+# unknown crops as maize)
+UNKNOWN_CODE = 0
+
+FEATURE_DTYPE = np.float32
+# Requests are scored in float64, exactly like the scalar rule_based_prediction
+# and interpret_features; models cast to FEATURE_DTYPE themselves
+SCORING_DTYPE = np.float64
+
+
+class FeatureSchema:
+    """
+    Feature order and category lists of a model, compiled into a row encoder
+
+    Categorical values are matched case-insensitively.
+
+    Args:
+        columns: Feature names in model order
+        categories: Category list per field behind each "<field>_encoded" feature
+        unknown_code: Code given to values outside a field's category list
+    """
+
+    def __init__(self, columns, categories: dict, unknown_code: int = UNKNOWN_CODE):
+        self.columns = list(columns)
+        self.categories = {field: list(values) for field, values in categories.items()}
+        self.unknown_code = unknown_code
+        self.n_features = len(self.columns)
+        self.index = {name: i for i, name in enumerate(self.columns)}
+        # Input field read for each feature
+        self.fields = [self.source_field(name) for name in self.columns]
+        self.codes = {field: {value.lower(): code for code, value in enumerate(values)}
+                      for field, values in self.categories.items()}
+        self._getters = [self._getter(field) for field in self.fields]
+
+    def source_field(self, name: str) -> str:
+        if name.endswith(ENCODED_SUFFIX) and name[:-len(ENCODED_SUFFIX)] in self.categories:
+            return name[:-len(ENCODED_SUFFIX)]
+        return name
+
+    def _getter(self, field: str):
+        # Reads one feature from a record; categorical fields return their code
+        if not field.isidentifier():
+            raise ValueError(f"Feature field {field!r} is not a valid attribute name")
+        get = attrgetter(field)
+        if field not in self.categories:
+            return get
+        codes, unknown = self.codes[field], self.unknown_code
+        return lambda record: codes.get(get(record).lower(), unknown)
+
+    @classmethod
+    def from_training_schema(cls, path: str = SCHEMA_PATH):
+        """Feature order and category lists from training_data_schema.json"""
+        with open(path) as f:
+            schema = json.load(f)
+        column_types = schema['column_types']
+        columns = schema['model_features']
+        categories = {}
+        for name in columns:
+            field = name[:-len(ENCODED_SUFFIX)] if name.endswith(ENCODED_SUFFIX) else None
+            if field is not None and isinstance(column_types.get(field), dict):
+                categories[field] = column_types[field]['category']
+        return cls(columns, categories)
+
+    @classmethod
+    def load(cls, path: str):
+        with open(path) as f:
+            spec = json.load(f)
+        return cls(spec['columns'], spec['categories'], spec.get('unknown_code', UNKNOWN_CODE))
+
+    def to_dict(self) -> dict:
+        return {
+            'columns': self.columns,
+            'categories': self.categories,
+            'unknown_code': self.unknown_code,
+            'dtype': np.dtype(FEATURE_DTYPE).name
+        }
+
+    def save(self, path: str):
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def __eq__(self, other) -> bool:
+        return isinstance(other, FeatureSchema) and self.to_dict() == other.to_dict()
+
+    def empty(self, n_rows: int, dtype=FEATURE_DTYPE) -> np.ndarray:
+        """Uninitialized (n_rows x n_features) matrix, float32 by default"""
+        return np.empty((n_rows, self.n_features), dtype=dtype)
+
+    def _output(self, n_rows: int, out, dtype):
+        if out is None:
+            return self.empty(n_rows, dtype)
+        if out.shape != (n_rows, self.n_features) or out.dtype != dtype or not out.flags.c_contiguous:
+            raise ValueError(f"out must be a C-contiguous {np.dtype(dtype).name} "
+                             f"({n_rows}, {self.n_features}) array")
+        return out
+
+    def encode_row(self, record, out: np.ndarray = None, dtype=FEATURE_DTYPE) -> np.ndarray:
+        """
+        Encode one record (any object with the feature fields as attributes,
+        e.g. FarmInput)
+
+        Returns:
+            np.ndarray: (1 x n_features) matrix of dtype (float32 by default)
+        """
+        X = self._output(1, out, dtype)
+        X[0] = [get(record) for get in self._getters]
+        return X
+
+    def encode(self, records, out: np.ndarray = None, dtype=FEATURE_DTYPE) -> np.ndarray:
+        """
+        Encode a sequence of records into one matrix, feature by feature
+
+        Returns:
+            np.ndarray: (n_records x n_features) matrix of dtype (float32 by
+            default), in record order
+        """
+        n_rows = len(records)
+        if n_rows == 1:
+            return self.encode_row(records[0], out, dtype)
+        X = self._output(n_rows, out, dtype)
+        for j, get in enumerate(self._getters):
+            X[:, j] = np.fromiter(map(get, records), dtype=dtype, count=n_rows)
+        return X
+
+    def encode_frame(self, df, out: np.ndarray = None, dtype=FEATURE_DTYPE) -> np.ndarray:
+        """
+        Encode a DataFrame with the feature fields as columns, column by column
+
+        Categorical fields may be strings or pandas categoricals; either way
+        values are matched case-insensitively, as records are.
+
+        Returns:
+            np.ndarray: (len(df) x n_features) matrix of dtype (float32 by default)
+        """
+        X = self._output(len(df), out, dtype)
+        for j, field in enumerate(self.fields):
+            if field in self.categories:
+                X[:, j] = self.encode_categories(field, df[field])
+            else:
+                X[:, j] = df[field].to_numpy()
+        return X
+
+    def encode_categories(self, field: str, values) -> np.ndarray:
+        """
+        Codes of a pandas Series of one categorical field
+
+        Returns:
+            np.ndarray: int64 code per value, unknown_code for unknown or missing ones
+        """
+        mapping = self.codes[field]
+        if getattr(values.dtype, 'name', None) == 'category':
+            # Look each category up once, then index by the category codes
+            # (-1, a missing value, picks the trailing -1)
+            lookup = np.array([mapping.get(str(value).lower(), -1) for value in values.cat.categories] + [-1],
+                              dtype=np.int64)
+            codes = lookup[values.cat.codes.to_numpy()]
+        else:
+            codes = values.astype('string').str.lower().map(mapping).fillna(-1).to_numpy(np.int64)
+        codes[codes < 0] = self.unknown_code
+        return codes
+
+
+def schema_path_for(model_path: str) -> str:
+    """Where the feature schema of a model artifact is saved"""
+    return os.path.join(os.path.dirname(model_path), FEATURE_SCHEMA_FILENAME)
+
+
+def load_model_schema(model_path: str, default: FeatureSchema = None) -> FeatureSchema:
+    """
+    Schema saved next to a model artifact, or `default` (the training schema
+    when not given) for artifacts trained before schemas were saved
+    """
+    path = schema_path_for(model_path)
+    if os.path.exists(path):
+        return FeatureSchema.load(path)
+    return default if default is not None else FeatureSchema.from_training_schema()
+
+
+# Schema of the current training data, used for training and for requests
+# scored by the rule-based engine or by models saved without a schema
+FEATURE_SCHEMA = FeatureSchema.from_training_schema()
+FEATURE_COLUMNS = FEATURE_SCHEMA.columns
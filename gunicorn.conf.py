@@ -0,0 +1,28 @@
+"""
+FieldScore AI - Gunicorn Configuration
+Multi-worker deployment that loads the app and model once in the master and
+forks the workers from it, so they share the model and the imported libraries'
+memory copy-on-write instead of each loading their own
+
+Run from the project root: gunicorn api:app -c gunicorn.conf.py
+"""
+
+import gc
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", "4"))
+worker_class = "uvicorn.workers.UvicornWorker"
+
+# "0" imports the app in every worker instead (each worker loads its own model)
+preload_app = os.getenv("PRELOAD_APP", "1") == "1"
+if preload_app:
+    # Read by api.py at import: load the model in the master, warm the booster per worker
+    os.environ.setdefault("MODEL_LOAD", "prefork")
+
+
+def pre_fork(server, worker):
+    # Move everything allocated so far to a permanent generation the collector
+    # never scans; otherwise the first GC in each worker writes to (and copies)
+    # the pages holding the shared objects
+    gc.freeze()
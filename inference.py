@@ -0,0 +1,69 @@
+"""
+FieldScore AI - Inference Executor
+Runs CPU-bound scoring off the event loop on a bounded thread or process pool
+"""
+
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+# "thread" (default) or "process"; threads suit XGBoost/NumPy, which release the GIL
+INFERENCE_EXECUTOR = os.getenv("INFERENCE_EXECUTOR", "thread")
+INFERENCE_WORKERS = int(os.getenv("INFERENCE_WORKERS", str(min(4, os.cpu_count() or 1))))
+# Scoring calls allowed in flight at once; further requests wait on the event loop
+INFERENCE_MAX_CONCURRENCY = int(os.getenv("INFERENCE_MAX_CONCURRENCY", str(INFERENCE_WORKERS * 2)))
+
+
+class InferenceExecutor:
+    """
+    Bounded executor for synchronous scoring functions
+
+    Functions submitted in process mode must be importable module-level
+    callables, and their arguments and results must be picklable.
+    """
+
+    def __init__(self, kind: str = "thread", max_workers: int = 4, max_concurrency: int = 8):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown inference executor: {kind!r} (expected 'thread' or 'process')")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self._pool = None
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    @property
+    def pool(self):
+        # Created on first use so importing the API never forks or spawns workers
+        if self._pool is None:
+            if self.kind == "process":
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            else:
+                self._pool = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="inference"
+                )
+        return self._pool
+
+    async def run(self, fn, *args):
+        """
+        Run fn(*args) on the pool once a concurrency slot is free
+
+        Returns:
+            The function's return value
+        """
+        async with self._semaphore:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.pool, fn, *args)
+
+    def shutdown(self, wait: bool = True):
+        if self._pool is not None:
+            self._pool.shutdown(wait=wait)
+            self._pool = None
+
+
+def create_executor() -> InferenceExecutor:
+    """Build the executor configured by the INFERENCE_* environment variables"""
+    return InferenceExecutor(
+        kind=INFERENCE_EXECUTOR,
+        max_workers=INFERENCE_WORKERS,
+        max_concurrency=INFERENCE_MAX_CONCURRENCY
+    )
@@ -0,0 +1,248 @@
+"""
+FieldScore AI - In-Process Metrics
+Lightweight histograms for tuning and monitoring the API, per-stage request
+timing, and their Prometheus text export
+"""
+
+from bisect import bisect_left
+from time import perf_counter
+
+import numpy as np
+
+# Upper bounds (seconds) of request and stage latency histograms
+LATENCY_BUCKETS_S = [
+    0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005,
+    0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0
+]
+
+
+class Histogram:
+    """
+    Fixed-bucket histogram with Prometheus-style cumulative buckets
+
+    Args:
+        buckets: Ascending upper bounds; values above the last bound land in +Inf
+    """
+
+    def __init__(self, buckets):
+        self.buckets = sorted(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.count += 1
+        self.sum += value
+
+    def observe_many(self, values):
+        """Add a batch of values with one vectorized bucket search"""
+        values = np.asarray(values, dtype=np.float64)
+        counts = np.bincount(np.searchsorted(self.buckets, values, side='left'), minlength=len(self.counts))
+        self.counts = [old + int(new) for old, new in zip(self.counts, counts)]
+        self.count += len(values)
+        self.sum += float(values.sum())
+
+    def reset(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def snapshot(self) -> dict:
+        """
+        Returns:
+            dict: count, sum, mean and cumulative counts per upper bound
+        """
+        cumulative = []
+        running = 0
+        for bound, count in zip(self.buckets + ['+Inf'], self.counts):
+            running += count
+            cumulative.append([bound, running])
+        return {
+            'count': self.count,
+            'sum': round(self.sum, 6),
+            'mean': round(self.sum / self.count, 6) if self.count else None,
+            'buckets': cumulative
+        }
+
+
+class RequestTiming:
+    """
+    Durations of the stages of one request, in the order they ran
+
+    Endpoints get it as request.state.timing and call mark() as each stage
+    ends; the middleware adds the serialization stage and the total.
+    """
+
+    __slots__ = ("endpoint", "path", "start", "last", "names", "durations")
+
+    def __init__(self, endpoint: str):
+        self.endpoint = endpoint
+        # Scoring path label, e.g. "model" or "rule_based"
+        self.path = "none"
+        self.start = self.last = perf_counter()
+        self.names = []
+        self.durations = []
+
+    def mark(self, stage: str):
+        """Close `stage`, which ran since the previous mark (or the request start)"""
+        now = perf_counter()
+        self.names.append(stage)
+        self.durations.append(now - self.last)
+        self.last = now
+
+    def add(self, stages):
+        """Append (stage, seconds) pairs measured elsewhere, e.g. in an inference worker"""
+        for stage, seconds in stages:
+            self.names.append(stage)
+            self.durations.append(seconds)
+
+    def header(self, total: float) -> bytes:
+        """Server-Timing header value (durations in milliseconds)"""
+        names = tuple(self.names)
+        template = _header_templates.get(names)
+        if template is None:
+            template = _header_templates[names] = header_template(names)
+        # One %-format call for all durations is the cheapest way to render them
+        return template % tuple([seconds * 1000 for seconds in self.durations] + [total * 1000])
+
+
+def header_template(names) -> bytes:
+    """Server-Timing format string for one stage sequence, with a slot per duration"""
+    return ("".join([stage + ";dur=%.3f, " for stage in names]) + "total;dur=%.3f").encode()
+
+
+# Header templates by stage sequence; an endpoint only ever produces a handful
+_header_templates = {}
+
+
+class RequestMetrics:
+    """
+    Request counts and latency / per-stage histograms by endpoint and scoring
+    path, rendered in the Prometheus text exposition format
+
+    Requests are buffered, grouped by endpoint, path, status and stage
+    sequence, and folded into the histograms in bulk, which keeps the work done
+    per request to a dict lookup and two appends. Only used from the event
+    loop, so no locking is needed.
+    """
+
+    # Buffered requests that trigger a fold
+    FOLD_EVERY = 1024
+
+    def __init__(self, buckets=LATENCY_BUCKETS_S):
+        self.buckets = buckets
+        self.requests = {}
+        self.latency = {}
+        self.stages = {}
+        self.pending = {}
+        self.n_pending = 0
+
+    def observe(self, timing: RequestTiming, total: float, status: int):
+        key = (timing.endpoint, timing.path, status, tuple(timing.names))
+        group = self.pending.get(key)
+        if group is None:
+            group = self.pending[key] = ([], [])
+        group[0].append(total)
+        group[1].append(timing.durations)
+        self.n_pending += 1
+        if self.n_pending >= self.FOLD_EVERY:
+            self.fold()
+
+    def _histogram(self, histograms: dict, key: tuple) -> Histogram:
+        if key not in histograms:
+            histograms[key] = Histogram(self.buckets)
+        return histograms[key]
+
+    def fold(self):
+        """Move buffered requests into the counters and histograms"""
+        pending, self.pending, self.n_pending = self.pending, {}, 0
+        for (endpoint, path, status, names), (totals, durations) in pending.items():
+            self.requests[(endpoint, path, status)] = self.requests.get((endpoint, path, status), 0) + len(totals)
+            self._histogram(self.latency, (endpoint, path)).observe_many(totals)
+            durations = np.array(durations, dtype=np.float64).reshape(len(totals), len(names))
+            for i, stage in enumerate(names):
+                self._histogram(self.stages, (endpoint, stage)).observe_many(durations[:, i])
+
+    def render(self) -> str:
+        """Prometheus text format (version 0.0.4)"""
+        self.fold()
+        lines = [
+            "# HELP fieldscore_requests_total Requests by endpoint, scoring path and status",
+            "# TYPE fieldscore_requests_total counter"
+        ]
+        for (endpoint, path, status), count in sorted(self.requests.items()):
+            lines.append(f'fieldscore_requests_total{{endpoint="{endpoint}",path="{path}",status="{status}"}} {count}')
+
+        lines += [
+            "# HELP fieldscore_request_duration_seconds Request latency by endpoint and scoring path",
+            "# TYPE fieldscore_request_duration_seconds histogram"
+        ]
+        for (endpoint, path), histogram in sorted(self.latency.items()):
+            lines += prometheus_histogram("fieldscore_request_duration_seconds", histogram,
+                                          f'endpoint="{endpoint}",path="{path}"')
+
+        lines += [
+            "# HELP fieldscore_stage_duration_seconds Time spent in each stage of a request",
+            "# TYPE fieldscore_stage_duration_seconds histogram"
+        ]
+        for (endpoint, stage), histogram in sorted(self.stages.items()):
+            lines += prometheus_histogram("fieldscore_stage_duration_seconds", histogram,
+                                          f'endpoint="{endpoint}",stage="{stage}"')
+        return "\n".join(lines) + "\n"
+
+
+def prometheus_histogram(name: str, histogram: Histogram, labels: str) -> list:
+    """Sample lines (cumulative buckets, sum, count) of one labelled histogram"""
+    lines = []
+    running = 0
+    for bound, count in zip(histogram.buckets + ["+Inf"], histogram.counts):
+        running += count
+        lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {running}')
+    lines.append(f"{name}_sum{{{labels}}} {histogram.sum}")
+    lines.append(f"{name}_count{{{labels}}} {histogram.count}")
+    return lines
+
+
+class StageTimingMiddleware:
+    """
+    ASGI middleware that times requests to the instrumented endpoints
+
+    A RequestTiming is available to the endpoint as request.state.timing. When
+    the response starts, the time since the endpoint's last mark is recorded as
+    "serialize" (or "validate" if the endpoint never ran, e.g. a 422), the
+    request goes into RequestMetrics, and with server_timing the stages are
+    echoed in a Server-Timing header.
+    """
+
+    def __init__(self, app, metrics: RequestMetrics, endpoints, server_timing: bool = False):
+        self.app = app
+        self.metrics = metrics
+        self.endpoints = frozenset(endpoints)
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        path = scope["path"]
+        root_path = scope.get("root_path")
+        if root_path and path.startswith(root_path):
+            path = path[len(root_path):]
+        if path not in self.endpoints:
+            await self.app(scope, receive, send)
+            return
+
+        timing = RequestTiming(path)
+        scope.setdefault("state", {})["timing"] = timing
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start":
+                timing.mark("serialize" if timing.names else "validate")
+                total = timing.last - timing.start
+                self.metrics.observe(timing, total, message["status"])
+                if self.server_timing:
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.header(total))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_timing)
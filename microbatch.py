@@ -0,0 +1,164 @@
+"""
+FieldScore AI - Adaptive Micro-Batching
+Coalesces concurrent single-farm /predict requests into vectorized model calls
+"""
+
+import asyncio
+import os
+import time
+
+from metrics import Histogram
+
+# Opt-in: set MICROBATCH_ENABLED=1 to route /predict through the batcher
+MICROBATCH_ENABLED = os.getenv("MICROBATCH_ENABLED", "0") == "1"
+MICROBATCH_MAX_SIZE = int(os.getenv("MICROBATCH_MAX_SIZE", "64"))
+MICROBATCH_MAX_WAIT_MS = float(os.getenv("MICROBATCH_MAX_WAIT_MS", "2"))
+# Batches scored at the same time; while all slots are busy the queue keeps
+# filling, so batches grow with load
+MICROBATCH_MAX_INFLIGHT = int(os.getenv("MICROBATCH_MAX_INFLIGHT", "2"))
+
+BATCH_SIZE_BUCKETS = [1, 2, 4, 8, 16, 32, 64, 128, 256, 512]
+QUEUE_WAIT_MS_BUCKETS = [0.1, 0.25, 0.5, 1, 2, 5, 10, 25, 50, 100, 250]
+
+
+class MicroBatcher:
+    """
+    Queue single items and score them in batches
+
+    A batch is flushed when it reaches max_batch_size, or when its oldest item
+    has waited max_wait_ms, whichever comes first.
+
+    Args:
+        score_fn: Synchronous function mapping a list of items to a list of results
+        run: Coroutine function used to execute score_fn, e.g. InferenceExecutor.run
+        max_batch_size: Largest batch passed to score_fn
+        max_wait_ms: Longest time an item waits for others to join its batch
+        max_inflight: Batches allowed to be scoring concurrently
+    """
+
+    def __init__(self, score_fn, run, max_batch_size: int = 64, max_wait_ms: float = 2.0,
+                 max_inflight: int = 2):
+        self.score_fn = score_fn
+        self.run = run
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.max_inflight = max_inflight
+
+        self.batch_sizes = Histogram(BATCH_SIZE_BUCKETS)
+        self.queue_wait_ms = Histogram(QUEUE_WAIT_MS_BUCKETS)
+        self.flushes = {'size': 0, 'timeout': 0}
+        self.errors = 0
+
+        self._loop = None
+        self._queue = None
+        self._worker = None
+        self._inflight = None
+
+    def _ensure_started(self):
+        # Bind to the running loop on first use (and again if it was replaced)
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._inflight = asyncio.Semaphore(self.max_inflight)
+            self._worker = loop.create_task(self._collect())
+
+    async def submit(self, item):
+        """
+        Queue one item and wait for its result
+
+        Returns:
+            The result score_fn produced for this item
+        """
+        self._ensure_started()
+        future = self._loop.create_future()
+        self._queue.put_nowait((item, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        queue = self._queue
+        while True:
+            await self._inflight.acquire()
+            first = await queue.get()
+            batch = [first]
+            deadline = first[2] + self.max_wait
+            reason = 'size'
+
+            while len(batch) < self.max_batch_size:
+                if not queue.empty():
+                    batch.append(queue.get_nowait())
+                    continue
+                remaining = deadline - time.perf_counter()
+                if remaining <= 0:
+                    reason = 'timeout'
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    reason = 'timeout'
+                    break
+
+            self._loop.create_task(self._flush(batch, reason))
+
+    async def _flush(self, batch: list, reason: str):
+        try:
+            started = time.perf_counter()
+            self.flushes[reason] += 1
+            self.batch_sizes.observe(len(batch))
+            for _, _, enqueued in batch:
+                self.queue_wait_ms.observe((started - enqueued) * 1000)
+
+            try:
+                results = await self.run(self.score_fn, [item for item, _, _ in batch])
+            except Exception as e:
+                self.errors += 1
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+
+            for (_, future, _), result in zip(batch, results):
+                if not future.done():
+                    future.set_result(result)
+        finally:
+            self._inflight.release()
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: Configuration, flush counts and batch-size / queue-wait histograms
+        """
+        return {
+            'max_batch_size': self.max_batch_size,
+            'max_wait_ms': self.max_wait * 1000,
+            'max_inflight': self.max_inflight,
+            'flushes': dict(self.flushes),
+            'errors': self.errors,
+            'queued': self._queue.qsize() if self._queue is not None else 0,
+            'batch_size': self.batch_sizes.snapshot(),
+            'queue_wait_ms': self.queue_wait_ms.snapshot()
+        }
+
+    def close(self):
+        if self._worker is not None:
+            self._worker.cancel()
+            self._worker = None
+            self._loop = None
+
+
+def create_microbatcher(score_fn, run):
+    """
+    Build the batcher configured by the MICROBATCH_* environment variables
+
+    Returns:
+        MicroBatcher, or None when micro-batching is disabled
+    """
+    if not MICROBATCH_ENABLED:
+        return None
+    return MicroBatcher(
+        score_fn,
+        run,
+        max_batch_size=MICROBATCH_MAX_SIZE,
+        max_wait_ms=MICROBATCH_MAX_WAIT_MS,
+        max_inflight=MICROBATCH_MAX_INFLIGHT
+    )
@@ -0,0 +1,410 @@
+"""
+FieldScore AI - Versioned Model Registry
+Loads versioned model artifacts from a registry directory, pre-warms them and
+swaps the active model atomically without dropping in-flight requests
+
+Registry layout:
+    models/registry/
+        manifest.json            {"active": "v2", "versions": {"v1": {...}, "v2": {...}}}
+        v1/risk_score_regressor.pkl
+        v1/feature_schema.json   (when the model was trained with one)
+        v2/risk_score_regressor.pkl
+
+Publish a trained model:
+    python model_registry.py publish models/risk_score_regressor.pkl [--version v3] [--no-activate]
+Switch the active version:
+    python model_registry.py activate v2
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+import numpy as np
+
+from feature_schema import FEATURE_COLUMNS, FEATURE_DTYPE, FEATURE_SCHEMA, load_model_schema, schema_path_for
+from tree_eval import compile_model
+
+MODEL_REGISTRY_DIR = os.getenv("MODEL_REGISTRY_DIR", "models/registry")
+MANIFEST_NAME = "manifest.json"
+MODEL_FILENAME = "risk_score_regressor.pkl"
+# Seconds between manifest checks; 0 disables the file watch
+MODEL_WATCH_INTERVAL = float(os.getenv("MODEL_WATCH_INTERVAL", "5"))
+
+RULE_BASED_VERSION = "rule-based"
+
+# Synthetic rows (FEATURE_COLUMNS order) scored before a model goes live
+WARMUP_ROWS = np.array([
+    [2.5, 0.72, 0.015, -0.02, -0.35, 15.2, 0.18, 1.8, 0, 1500],
+    [5.0, 0.55, -0.025, -0.08, -2.5, 78.5, 0.45, 1.2, 3, 3000],
+    [1.2, 0.68, -0.008, 0.03, -1.2, 45.8, 0.32, 2.1, 2, 2500],
+    [3.8, 0.78, 0.022, 0.05, 0.8, 8.3, 0.12, 2.5, 1, 2000],
+], dtype=np.float32)
+
+
+class LoadedModel:
+    """
+    One loaded model version with its compiled tree evaluator and the feature
+    schema its requests are encoded with
+
+    in_flight counts requests currently using this version; a retired version
+    is released once it drops to zero.
+    """
+
+    def __init__(self, version: str, path: str, model, tree_evaluator: str = "native",
+                 tree_eval_max_rows: int = 64, schema=FEATURE_SCHEMA):
+        if schema.columns != FEATURE_COLUMNS:
+            raise ValueError(f"Model {version} expects features {schema.columns}, not {FEATURE_COLUMNS}")
+        self.version = version
+        self.path = path
+        self.model = model
+        self.schema = schema
+        self.tree_evaluator = tree_evaluator
+        self.tree_eval_max_rows = tree_eval_max_rows
+        self.compiled = compile_model(model) if tree_evaluator == "native" else None
+        self.in_flight = 0
+
+    @classmethod
+    def load(cls, version: str, path: str, tree_evaluator: str = "native", tree_eval_max_rows: int = 64):
+        # Deferred: joblib (and the model's own libraries) are only needed once a model loads
+        import joblib
+
+        return cls(version, path, joblib.load(path), tree_evaluator, tree_eval_max_rows,
+                   load_model_schema(path, FEATURE_SCHEMA))
+
+    def predict(self, X) -> np.ndarray:
+        """
+        Raw model output for a feature matrix, using the native tree evaluator
+        for small inputs when the model could be compiled
+
+        X is cast to FEATURE_DTYPE, the dtype the model was trained on.
+        """
+        X = np.asarray(X, dtype=FEATURE_DTYPE)
+        if self.compiled is not None and len(X) <= self.tree_eval_max_rows:
+            return self.compiled.predict(X)
+        return self.model.predict(X)
+
+    def warm_up(self, booster: bool = True):
+        """
+        Exercise the single-row, small-batch and large-batch paths once
+
+        Args:
+            booster: Also run model.predict. Off in a pre-fork master, which must
+                not start XGBoost's OpenMP threads before it forks the workers
+        """
+        if not booster:
+            if self.compiled is not None:
+                self.compiled.predict(WARMUP_ROWS[:1])
+                self.compiled.predict(WARMUP_ROWS)
+            return
+        self.predict(WARMUP_ROWS[:1])
+        self.predict(WARMUP_ROWS)
+        self.predict(np.repeat(WARMUP_ROWS, self.tree_eval_max_rows // len(WARMUP_ROWS) + 1, axis=0))
+
+    def __reduce__(self):
+        # Process-pool workers reload from disk (once per version) instead of
+        # receiving the pickled model with every call
+        return (_load_in_worker, (self.version, self.path, self.tree_evaluator, self.tree_eval_max_rows))
+
+
+_worker_models = {}
+
+def _load_in_worker(version, path, tree_evaluator, tree_eval_max_rows):
+    key = (version, path)
+    if key not in _worker_models:
+        _worker_models.clear()
+        _worker_models[key] = LoadedModel.load(version, path, tree_evaluator, tree_eval_max_rows)
+    return _worker_models[key]
+
+
+class ModelRegistry:
+    """
+    Tracks the active model version and swaps it atomically
+
+    Without a manifest in registry_dir, the single artifact at legacy_path is
+    served (version "legacy@<mtime in ns>"), and with neither the API falls back to
+    rule-based scoring (version "rule-based").
+    """
+
+    def __init__(self, registry_dir: str = MODEL_REGISTRY_DIR, legacy_path: str = None,
+                 tree_evaluator: str = "native", tree_eval_max_rows: int = 64):
+        self.registry_dir = registry_dir
+        self.legacy_path = legacy_path
+        self.tree_evaluator = tree_evaluator
+        self.tree_eval_max_rows = tree_eval_max_rows
+        self.active = None
+        self.retired = []
+        self.swap_listeners = []
+        # Set once load_active has finished, whatever it found
+        self.loaded = False
+        self._lock = threading.Lock()
+        self._swap_lock = threading.Lock()
+        self._watched_mtime = None
+
+    @property
+    def manifest_path(self) -> str:
+        return os.path.join(self.registry_dir, MANIFEST_NAME)
+
+    @property
+    def version(self) -> str:
+        active = self.active
+        return active.version if active is not None else RULE_BASED_VERSION
+
+    def read_manifest(self):
+        """
+        Returns:
+            dict: Parsed manifest, or None if the registry has none
+        """
+        if not os.path.exists(self.manifest_path):
+            return None
+        with open(self.manifest_path) as f:
+            return json.load(f)
+
+    def resolve(self, version: str = None) -> tuple:
+        """
+        Find the artifact for a version (default: the manifest's active one)
+
+        Returns:
+            tuple: (version, path), or (None, None) if there is nothing to load
+        """
+        manifest = self.read_manifest()
+        if manifest is not None:
+            version = version or manifest.get("active")
+            if version not in manifest.get("versions", {}):
+                raise KeyError(f"Unknown model version: {version}")
+            entry = manifest["versions"][version]
+            return version, os.path.join(self.registry_dir, entry["path"])
+
+        if version is not None:
+            raise KeyError(f"No registry manifest at {self.manifest_path}")
+        if self.legacy_path and os.path.exists(self.legacy_path):
+            return f"legacy@{os.stat(self.legacy_path).st_mtime_ns}", self.legacy_path
+        return None, None
+
+    def activate(self, version: str = None, warm_booster: bool = True) -> str:
+        """
+        Load, pre-warm and swap in a version (default: the manifest's active one)
+
+        Blocking; call from a worker thread when running inside the event loop.
+
+        Args:
+            warm_booster: Include model.predict in the warm-up (see LoadedModel.warm_up)
+
+        Returns:
+            str: The version now active
+        """
+        with self._swap_lock:
+            version, path = self.resolve(version)
+            if version is None:
+                return self.version
+            if self.active is not None and self.active.version == version:
+                return version
+
+            candidate = LoadedModel.load(version, path, self.tree_evaluator, self.tree_eval_max_rows)
+            candidate.warm_up(booster=warm_booster)
+
+            with self._lock:
+                previous, self.active = self.active, candidate
+                if previous is not None:
+                    self.retired.append(previous)
+                self._release_idle()
+
+            print(f"✓ Model version {version} active (loaded from {path})")
+            for listener in self.swap_listeners:
+                listener(previous, candidate)
+            return version
+
+    def load_active(self, warm_booster: bool = True):
+        """Load the initial model, falling back to rule-based scoring on error"""
+        try:
+            version = self.activate(warm_booster=warm_booster)
+            if version == RULE_BASED_VERSION:
+                print(f"⚠ No model in {self.registry_dir} or {self.legacy_path}. Using rule-based prediction.")
+        except Exception as e:
+            print(f"⚠ Error loading model: {e}. Using rule-based prediction.")
+        self._watched_mtime = self._watch_target_mtime()
+        self.loaded = True
+
+    def warm_up(self):
+        """Finish warming the active model, e.g. in a worker forked after load_active(warm_booster=False)"""
+        active = self.active
+        if active is not None:
+            active.warm_up()
+
+    @contextmanager
+    def acquire(self):
+        """
+        Pin the active model for the duration of a request
+
+        Yields:
+            LoadedModel, or None when scoring is rule-based
+        """
+        with self._lock:
+            handle = self.active
+            if handle is not None:
+                handle.in_flight += 1
+        try:
+            yield handle
+        finally:
+            if handle is not None:
+                with self._lock:
+                    handle.in_flight -= 1
+                    if handle is not self.active:
+                        self._release_idle()
+
+    def _release_idle(self):
+        # Drop retired versions nobody is using any more (caller holds _lock)
+        self.retired = [handle for handle in self.retired if handle.in_flight > 0]
+
+    def _watch_target_mtime(self):
+        for path in (self.manifest_path, self.legacy_path):
+            if path and os.path.exists(path):
+                return (path, os.stat(path).st_mtime_ns)
+        return None
+
+    async def watch(self, interval: float = MODEL_WATCH_INTERVAL):
+        """Poll the manifest (or legacy artifact) and activate changes"""
+        while True:
+            await asyncio.sleep(interval)
+            mtime = self._watch_target_mtime()
+            if mtime == self._watched_mtime:
+                continue
+            self._watched_mtime = mtime
+            try:
+                await asyncio.to_thread(self.activate)
+            except Exception as e:
+                print(f"⚠ Model reload failed: {e}. Keeping version {self.version}.")
+
+    def status(self) -> dict:
+        manifest = self.read_manifest() or {}
+        with self._lock:
+            return {
+                "active": self.version,
+                "loaded": self.loaded,
+                "in_flight": self.active.in_flight if self.active is not None else 0,
+                "retired": [{"version": h.version, "in_flight": h.in_flight} for h in self.retired],
+                "registry_dir": self.registry_dir,
+                "versions": sorted(manifest.get("versions", {}))
+            }
+
+
+class ModelVersionMiddleware:
+    """
+    ASGI middleware that pins the active model for each HTTP request
+
+    The handle is available to endpoints as request.state.model and its version
+    is reported in the X-Model-Version header of every response. Streaming
+    responses keep their version pinned until the last chunk is sent.
+    """
+
+    def __init__(self, app, registry: ModelRegistry):
+        self.app = app
+        self.registry = registry
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        with self.registry.acquire() as handle:
+            scope.setdefault("state", {})["model"] = handle
+            version = (handle.version if handle is not None else RULE_BASED_VERSION).encode()
+
+            async def send_with_version(message):
+                if message["type"] == "http.response.start":
+                    message.setdefault("headers", [])
+                    message["headers"] = list(message["headers"]) + [(b"x-model-version", version)]
+                await send(message)
+
+            await self.app(scope, receive, send_with_version)
+
+
+def write_manifest(registry_dir: str, manifest: dict):
+    """Atomically replace the registry manifest"""
+    path = os.path.join(registry_dir, MANIFEST_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def publish(model_path: str, registry_dir: str = MODEL_REGISTRY_DIR, version: str = None,
+            activate: bool = True, metadata: dict = None) -> str:
+    """
+    Copy a trained model artifact (and the feature_schema.json beside it, if
+    any) into the registry as a new version
+
+    Args:
+        model_path: Path of the .pkl written by train_model.py
+        version: Version name (default: v<N+1>)
+        activate: Make it the active version; running APIs pick it up on their next watch
+        metadata: Extra fields stored in the manifest entry (metrics, data range, ...)
+
+    Returns:
+        str: The published version
+    """
+    os.makedirs(registry_dir, exist_ok=True)
+    manifest_path = os.path.join(registry_dir, MANIFEST_NAME)
+    manifest = {"active": None, "versions": {}}
+    if os.path.exists(manifest_path):
+        with open(manifest_path) as f:
+            manifest = json.load(f)
+
+    version = version or f"v{len(manifest['versions']) + 1}"
+    if version in manifest["versions"]:
+        raise ValueError(f"Version {version} already exists in {registry_dir}")
+
+    version_dir = os.path.join(registry_dir, version)
+    os.makedirs(version_dir, exist_ok=True)
+    shutil.copy2(model_path, os.path.join(version_dir, MODEL_FILENAME))
+    if os.path.exists(schema_path_for(model_path)):
+        shutil.copy2(schema_path_for(model_path), schema_path_for(os.path.join(version_dir, MODEL_FILENAME)))
+
+    manifest["versions"][version] = {
+        "path": f"{version}/{MODEL_FILENAME}",
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "source": os.path.abspath(model_path),
+        **(metadata or {})
+    }
+    if activate or manifest.get("active") is None:
+        manifest["active"] = version
+    write_manifest(registry_dir, manifest)
+    return version
+
+
+def set_active_version(version: str, registry_dir: str = MODEL_REGISTRY_DIR):
+    """Point the manifest at an existing version"""
+    manifest_path = os.path.join(registry_dir, MANIFEST_NAME)
+    with open(manifest_path) as f:
+        manifest = json.load(f)
+    if version not in manifest["versions"]:
+        raise KeyError(f"Unknown model version: {version}")
+    manifest["active"] = version
+    write_manifest(registry_dir, manifest)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage the FieldScore AI model registry")
+    parser.add_argument("--registry-dir", default=MODEL_REGISTRY_DIR)
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    publish_cmd = commands.add_parser("publish", help="Add a trained model as a new version")
+    publish_cmd.add_argument("model_path")
+    publish_cmd.add_argument("--version")
+    publish_cmd.add_argument("--no-activate", action="store_true")
+
+    activate_cmd = commands.add_parser("activate", help="Switch the active version")
+    activate_cmd.add_argument("version")
+
+    args = parser.parse_args()
+    if args.command == "publish":
+        published = publish(args.model_path, args.registry_dir, args.version, not args.no_activate)
+        print(f"✓ Published {args.model_path} as {published}")
+    else:
+        set_active_version(args.version, args.registry_dir)
+        print(f"✓ Active version set to {args.version}")
@@ -0,0 +1,141 @@
+"""
+FieldScore AI - NDVI Time-Series Features
+Vectorized extraction of the five NDVI model features from raw per-farm NDVI
+series, with cloud-masked (NaN) observations ignored
+
+All farms share one time axis; a (farms x timesteps) array is processed in a
+single pass without Python loops over farms.
+"""
+
+import numpy as np
+
+# Output columns, named as in FarmInput / FEATURE_COLUMNS
+NDVI_FEATURE_COLUMNS = [
+    'ndvi_mean_12mo',
+    'ndvi_slope',
+    'ndvi_14day_delta',
+    'ndvi_anomaly_zscore',
+    'coefficient_of_variation'
+]
+
+# Sentinel-2 revisit interval, the default spacing between observations
+DEFAULT_STEP_DAYS = 5
+WINDOW_DAYS = 365
+DELTA_DAYS = 14
+# Observations averaged into the "current" value compared against the baseline
+RECENT_DAYS = 30
+# ndvi_slope is expressed in NDVI units per month
+SLOPE_UNIT_DAYS = 30
+
+
+def time_axis(n_steps: int, step_days: float = DEFAULT_STEP_DAYS) -> np.ndarray:
+    """Day offsets of n_steps evenly spaced observations, the last at day 0"""
+    return (np.arange(n_steps) - (n_steps - 1)) * float(step_days)
+
+
+def _masked_mean(Y0: np.ndarray, W: np.ndarray) -> tuple:
+    # Per-row mean of the weighted values, and the weight total
+    n = W.sum(axis=1)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return (Y0 * W).sum(axis=1) / n, n
+
+
+def _masked_std(Y0: np.ndarray, W: np.ndarray, mean: np.ndarray, n: np.ndarray) -> np.ndarray:
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.sqrt((W * (Y0 - mean[:, None]) ** 2).sum(axis=1) / n)
+
+
+def _last_valid_index(valid: np.ndarray) -> np.ndarray:
+    # For every (row, t), the index of the latest valid observation at or before t (-1 if none)
+    idx = np.where(valid, np.arange(valid.shape[1]), -1)
+    return np.maximum.accumulate(idx, axis=1)
+
+
+def extract_ndvi_features(series, days=None, mask=None, step_days: float = DEFAULT_STEP_DAYS,
+                          baseline_mean=None, baseline_std=None) -> np.ndarray:
+    """
+    Compute the NDVI model features for every farm in one vectorized pass
+
+    - ndvi_mean_12mo: mean of the valid observations in the last 365 days
+    - ndvi_slope: least-squares trend over the same window, per month
+    - ndvi_14day_delta: latest valid value minus the latest valid value at
+      least 14 days older
+    - ndvi_anomaly_zscore: mean of the last 30 days against the farm's baseline
+      mean and standard deviation
+    - coefficient_of_variation: standard deviation / mean over the 12-month window
+
+    Args:
+        series: (farms x timesteps) NDVI values, oldest first; NaN = missing/cloud
+        days: Day offset of each timestep (default: evenly spaced by step_days)
+        mask: Optional boolean array, False marks additional invalid observations
+        baseline_mean: Per-farm historical NDVI mean (default: the whole series)
+        baseline_std: Per-farm historical NDVI standard deviation (default: the whole series)
+
+    Returns:
+        np.ndarray: (farms x 5) float64 matrix ordered as NDVI_FEATURE_COLUMNS;
+            rows without enough valid observations for a feature hold NaN there
+    """
+    Y = np.atleast_2d(np.asarray(series, dtype=np.float64))
+    n_farms, n_steps = Y.shape
+    days = time_axis(n_steps, step_days) if days is None else np.asarray(days, dtype=np.float64)
+    if days.shape != (n_steps,):
+        raise ValueError(f"days has shape {days.shape}, expected ({n_steps},)")
+
+    valid = np.isfinite(Y)
+    if mask is not None:
+        valid &= np.asarray(mask, dtype=bool)
+    Y0 = np.where(valid, Y, 0.0)
+    latest = days[-1]
+
+    # 12-month window statistics
+    W = (valid & (days > latest - WINDOW_DAYS)).astype(np.float64)
+    mean, n = _masked_mean(Y0, W)
+    std = _masked_std(Y0, W, mean, n)
+
+    # NaN-aware least-squares slope against time in months
+    t = days / SLOPE_UNIT_DAYS
+    t_mean, _ = _masked_mean(np.broadcast_to(t, Y.shape), W)
+    dt = W * (t - t_mean[:, None])
+    with np.errstate(invalid='ignore', divide='ignore'):
+        slope = (dt * (Y0 - mean[:, None])).sum(axis=1) / (dt * dt).sum(axis=1)
+    slope[n < 2] = np.nan
+
+    # Latest valid value and the latest valid value DELTA_DAYS before it
+    last_valid = _last_valid_index(valid)
+    rows = np.arange(n_farms)
+    last = last_valid[:, -1]
+    last_days = np.where(last >= 0, days[np.maximum(last, 0)], np.nan)
+    before = np.searchsorted(days, last_days - DELTA_DAYS, side='right') - 1
+    earlier = np.where(before >= 0, last_valid[rows, np.maximum(before, 0)], -1)
+    has_delta = (last >= 0) & (earlier >= 0)
+    delta = np.where(has_delta, Y0[rows, np.maximum(last, 0)] - Y0[rows, np.maximum(earlier, 0)], np.nan)
+
+    # Recent level against the per-farm baseline
+    recent, _ = _masked_mean(Y0, (valid & (days > latest - RECENT_DAYS)).astype(np.float64))
+    if baseline_mean is None or baseline_std is None:
+        W_all = valid.astype(np.float64)
+        history_mean, n_all = _masked_mean(Y0, W_all)
+        history_std = _masked_std(Y0, W_all, history_mean, n_all)
+        baseline_mean = history_mean if baseline_mean is None else baseline_mean
+        baseline_std = history_std if baseline_std is None else baseline_std
+    baseline_mean = np.broadcast_to(np.asarray(baseline_mean, dtype=np.float64), (n_farms,))
+    baseline_std = np.broadcast_to(np.asarray(baseline_std, dtype=np.float64), (n_farms,))
+    with np.errstate(invalid='ignore', divide='ignore'):
+        zscore = np.where(baseline_std > 0, (recent - baseline_mean) / baseline_std, 0.0)
+        cv = np.where(mean > 0, std / mean, np.nan)
+    zscore[np.isnan(recent) | np.isnan(baseline_mean)] = np.nan
+
+    return np.column_stack([mean, slope, delta, zscore, cv])
+
+
+def ndvi_feature_records(features: np.ndarray) -> list:
+    """
+    Convert an extract_ndvi_features matrix into per-farm dicts
+
+    Returns:
+        list: Dict per farm keyed by NDVI_FEATURE_COLUMNS, None for NaN values
+    """
+    return [
+        {name: (None if np.isnan(value) else value) for name, value in zip(NDVI_FEATURE_COLUMNS, row)}
+        for row in features.tolist()
+    ]
@@ -0,0 +1,210 @@
+"""
+FieldScore AI - NDVI Raster Stage
+Computes NDVI = (NIR - Red) / (NIR + Red) over memory-mapped Sentinel-2 band
+rasters tile by tile, and aggregates it per farm footprint (zonal statistics)
+
+Farm footprints are given as a zone raster aligned with the bands: pixel value
+k > 0 belongs to farm k, 0 to no farm. All farms are aggregated in one sweep
+over the scene, and no band is ever fully loaded into memory.
+
+Per-date zonal means stack into a (farms x dates) series that
+ndvi_features.extract_ndvi_features turns into the FarmInput NDVI columns.
+
+Usage:
+    python ndvi_raster.py --zones zones.npy --scene=-10:red.npy:nir.npy --scene=0:red2.npy:nir2.npy
+"""
+
+import argparse
+import csv
+import math
+import sys
+
+import numpy as np
+
+from ndvi_features import NDVI_FEATURE_COLUMNS, extract_ndvi_features
+
+# Tile edge in pixels; one float32 tile of each band is ~4 MB
+TILE_SIZE = 1024
+# Zones with fewer valid (cloud-free, non-nodata) pixels are reported as missing
+MIN_VALID_PIXELS = 1
+
+METERS_PER_DEGREE = 111320.0
+
+
+def open_band(path: str, shape: tuple = None, dtype=np.uint16) -> np.ndarray:
+    """
+    Memory-map a band raster without reading it
+
+    Args:
+        path: .npy file (shape and dtype from its header), or headerless .raw/.bin
+        shape: (rows, cols), required for raw files
+        dtype: Pixel type of raw files (Sentinel-2 L2A reflectance is uint16)
+
+    Returns:
+        np.ndarray: Read-only memory-mapped array
+    """
+    if path.endswith(".npy"):
+        return np.load(path, mmap_mode="r")
+    if shape is None:
+        raise ValueError(f"shape is required for raw raster {path}")
+    return np.memmap(path, dtype=dtype, mode="r", shape=tuple(shape))
+
+
+def iter_tiles(shape: tuple, tile_size: int = TILE_SIZE):
+    """Yield (row slice, col slice) pairs covering a raster"""
+    rows, cols = shape
+    for r in range(0, rows, tile_size):
+        for c in range(0, cols, tile_size):
+            yield slice(r, min(r + tile_size, rows)), slice(c, min(c + tile_size, cols))
+
+
+def ndvi_tile(red: np.ndarray, nir: np.ndarray) -> tuple:
+    """
+    NDVI of one tile
+
+    Returns:
+        tuple: (ndvi as float32, valid mask); pixels with NIR + Red == 0
+            (nodata) are invalid
+    """
+    red = red.astype(np.float32)
+    nir = nir.astype(np.float32)
+    total = nir + red
+    valid = total > 0
+    ndvi = np.divide(nir - red, total, out=np.zeros_like(total), where=valid)
+    return ndvi, valid & np.isfinite(ndvi)
+
+
+def zonal_ndvi(red: np.ndarray, nir: np.ndarray, zones: np.ndarray, n_zones: int,
+               valid_mask: np.ndarray = None, tile_size: int = TILE_SIZE) -> dict:
+    """
+    Per-farm NDVI statistics for one scene in a single tiled sweep
+
+    Args:
+        red, nir: Band rasters (typically memory-mapped)
+        zones: Integer zone raster of the same shape; 0 = no farm
+        n_zones: Highest zone id
+        valid_mask: Optional raster, False/0 where pixels are cloudy or unusable
+        tile_size: Tile edge in pixels
+
+    Returns:
+        dict: 'mean', 'std' (float64) and 'count' (int64) arrays indexed by
+            zone id - 1; mean/std are NaN for zones below MIN_VALID_PIXELS
+    """
+    if red.shape != nir.shape or red.shape != zones.shape:
+        raise ValueError(f"Raster shapes differ: red {red.shape}, nir {nir.shape}, zones {zones.shape}")
+
+    length = n_zones + 1
+    sums = np.zeros(length)
+    sq_sums = np.zeros(length)
+    counts = np.zeros(length, dtype=np.int64)
+
+    for rows, cols in iter_tiles(red.shape, tile_size):
+        zone = np.asarray(zones[rows, cols])
+        if not zone.any():
+            continue
+        ndvi, valid = ndvi_tile(red[rows, cols], nir[rows, cols])
+        valid &= (zone > 0) & (zone <= n_zones)
+        if valid_mask is not None:
+            valid &= np.asarray(valid_mask[rows, cols], dtype=bool)
+
+        ids = zone[valid]
+        values = ndvi[valid].astype(np.float64)
+        sums += np.bincount(ids, weights=values, minlength=length)
+        sq_sums += np.bincount(ids, weights=values * values, minlength=length)
+        counts += np.bincount(ids, minlength=length)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        mean = sums / counts
+        std = np.sqrt(np.maximum(sq_sums / counts - mean * mean, 0.0))
+    missing = counts < MIN_VALID_PIXELS
+    mean[missing] = np.nan
+    std[missing] = np.nan
+    return {"mean": mean[1:], "std": std[1:], "count": counts[1:]}
+
+
+def zonal_ndvi_series(scenes: list, zones: np.ndarray, n_zones: int, tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    Stack per-scene zonal means into a (farms x dates) NDVI series
+
+    Args:
+        scenes: (red, nir) or (red, nir, valid_mask) tuples, oldest first
+
+    Returns:
+        np.ndarray: Mean NDVI per farm and scene, NaN where a farm had no valid pixels
+    """
+    series = np.full((n_zones, len(scenes)), np.nan)
+    for j, scene in enumerate(scenes):
+        red, nir = scene[:2]
+        valid_mask = scene[2] if len(scene) > 2 else None
+        series[:, j] = zonal_ndvi(red, nir, zones, n_zones, valid_mask, tile_size)["mean"]
+    return series
+
+
+def raster_ndvi_features(scenes: list, days, zones: np.ndarray, n_zones: int,
+                         tile_size: int = TILE_SIZE) -> np.ndarray:
+    """
+    FarmInput NDVI features for every farm, straight from band rasters
+
+    Args:
+        scenes: (red, nir[, valid_mask]) tuples, oldest first
+        days: Day offset of each scene
+
+    Returns:
+        np.ndarray: (farms x 5) matrix ordered as NDVI_FEATURE_COLUMNS; row k is zone k + 1
+    """
+    series = zonal_ndvi_series(scenes, zones, n_zones, tile_size)
+    return extract_ndvi_features(series, days=days)
+
+
+def farm_zones(path: str, shape: tuple, transform: tuple, latitudes, longitudes, areas_ha) -> np.ndarray:
+    """
+    Write a zone raster with a square footprint of each farm's area around its centre
+
+    Farms are numbered from 1 in input order; later farms overwrite overlaps.
+    The raster is written as a memory-mapped .npy file.
+
+    Args:
+        shape: (rows, cols) of the band rasters
+        transform: (west longitude, north latitude, pixel width deg, pixel height deg)
+            of a north-up grid
+
+    Returns:
+        np.ndarray: The memory-mapped zone raster (int32)
+    """
+    west, north, pixel_w, pixel_h = transform
+    zones = np.lib.format.open_memmap(path, mode="w+", dtype=np.int32, shape=tuple(shape))
+    for zone_id, (lat, lon, area) in enumerate(zip(latitudes, longitudes, areas_ha), start=1):
+        half_side_m = math.sqrt(area * 10000) / 2
+        half_lat = half_side_m / METERS_PER_DEGREE
+        half_lon = half_side_m / (METERS_PER_DEGREE * max(math.cos(math.radians(lat)), 1e-6))
+        r0 = max(int((north - (lat + half_lat)) / pixel_h), 0)
+        r1 = min(int(math.ceil((north - (lat - half_lat)) / pixel_h)), shape[0])
+        c0 = max(int((lon - half_lon - west) / pixel_w), 0)
+        c1 = min(int(math.ceil((lon + half_lon - west) / pixel_w)), shape[1])
+        if r0 < r1 and c0 < c1:
+            zones[r0:r1, c0:c1] = zone_id
+    zones.flush()
+    return zones
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Per-farm NDVI features from Sentinel-2 band rasters")
+    parser.add_argument("--zones", required=True, help="Zone raster (.npy, farm ids > 0)")
+    parser.add_argument("--scene", action="append", required=True,
+                        help="DAY:RED:NIR[:MASK] with .npy bands; DAY is the day offset (pass as --scene=-10:...)")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE)
+    args = parser.parse_args()
+
+    zones = open_band(args.zones)
+    n_zones = int(max(zones[rows, cols].max() for rows, cols in iter_tiles(zones.shape, args.tile_size)))
+    scenes, days = [], []
+    for spec in sorted(args.scene, key=lambda spec: float(spec.split(":")[0])):
+        day, *paths = spec.split(":")
+        days.append(float(day))
+        scenes.append(tuple(open_band(path) for path in paths))
+
+    features = raster_ndvi_features(scenes, days, zones, n_zones, args.tile_size)
+    writer = csv.writer(sys.stdout)
+    writer.writerow(["zone"] + NDVI_FEATURE_COLUMNS)
+    for zone_id, row in enumerate(features.tolist(), start=1):
+        writer.writerow([zone_id] + ["" if math.isnan(value) else round(value, 6) for value in row])
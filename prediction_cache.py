@@ -0,0 +1,140 @@
+"""
+FieldScore AI - Prediction Result Cache
+LRU+TTL cache of scored predictions keyed on the quantized feature vector and
+the model version that produced them; misses are scored on the exact features
+"""
+
+import os
+import sys
+
+import numpy as np
+
+from cache import TTLCache
+from scoring import FEATURE_COLUMNS, LABEL_THRESHOLDS
+
+# Cached predictions; 0 disables the cache
+PREDICTION_CACHE_SIZE = int(os.getenv("PREDICTION_CACHE_SIZE", "10000"))
+PREDICTION_CACHE_TTL_S = float(os.getenv("PREDICTION_CACHE_TTL_S", "3600"))
+PREDICTION_CACHE_MAX_MB = float(os.getenv("PREDICTION_CACHE_MAX_MB", "64"))
+
+# Decimal places each feature is rounded to for the cache key; finer differences
+# are below measurement precision (area to 0.01 ha, NDVI to 1e-4, rainfall to
+# 0.1 mm, loans to the dollar)
+QUANTIZE_DECIMALS = {
+    'farm_area_hectares': 2,
+    'ndvi_mean_12mo': 4,
+    'ndvi_slope': 5,
+    'ndvi_14day_delta': 4,
+    'ndvi_anomaly_zscore': 3,
+    'rainfall_deficit_30day': 1,
+    'coefficient_of_variation': 4,
+    'soil_organic_carbon': 3,
+    'crop_type_encoded': 0,
+    'loan_amount_usd': 0
+}
+
+# OrderedDict node, key tuple and entry tuple around each cached record
+ENTRY_OVERHEAD_BYTES = 200
+
+
+def entry_size(key, record) -> int:
+    """Approximate memory held by one cached (key, record) pair"""
+    return (sys.getsizeof(key[1]) + sys.getsizeof(record) + sys.getsizeof(record['features'])
+            + ENTRY_OVERHEAD_BYTES)
+
+
+class PredictionCache:
+    """
+    Serve repeat scoring of the same farm from memory
+
+    Entries are keyed on (model version, feature vector rounded to
+    QUANTIZE_DECIMALS), so farms that differ below measurement precision share
+    one entry, and the whole cache is dropped when the registry swaps models.
+    Misses are scored on the submitted features, never the rounded ones. A
+    value within one rounding step of a LABEL_THRESHOLDS threshold is keyed
+    unrounded, so farms sharing an entry always get the same labels.
+
+    Args:
+        maxsize: Maximum number of cached predictions
+        ttl: Seconds before a cached prediction expires
+        max_bytes: Approximate memory budget for the cache
+        decimals: Per-feature rounding (default QUANTIZE_DECIMALS)
+    """
+
+    def __init__(self, maxsize: int = 10000, ttl: float = 3600, max_bytes: int = None,
+                 decimals: dict = None):
+        decimals = decimals or QUANTIZE_DECIMALS
+        self.decimals = [decimals[name] for name in FEATURE_COLUMNS]
+        self.thresholds = [LABEL_THRESHOLDS.get(name, ()) for name in FEATURE_COLUMNS]
+        self.cache = TTLCache(maxsize=maxsize, ttl=ttl, max_bytes=max_bytes, sizeof=entry_size)
+        self.invalidations = 0
+
+    def quantize(self, X: np.ndarray) -> np.ndarray:
+        """
+        Round each column of a FEATURE_COLUMNS-ordered matrix to its precision,
+        except values within one rounding step of a label threshold, which
+        rounding could move across it
+
+        Returns:
+            np.ndarray: Canonical copy of X, same dtype (no negative zeros)
+        """
+        Xq = np.empty(X.shape, dtype=X.dtype)
+        for j, (decimals, thresholds) in enumerate(zip(self.decimals, self.thresholds)):
+            np.round(X[:, j], decimals, out=Xq[:, j])
+            step = 10.0 ** -decimals
+            for threshold in thresholds:
+                near = np.abs(X[:, j] - threshold) <= step
+                Xq[near, j] = X[near, j]
+        Xq += 0.0
+        return Xq
+
+    def score(self, X: np.ndarray, version: str, score_fn) -> list:
+        """
+        Look up every row of X and score only the misses
+
+        Args:
+            X: Feature matrix with columns ordered as FEATURE_COLUMNS
+            version: Version of the model the rows are scored with
+            score_fn: Maps rows of X to a list of PredictionOutput-shaped dicts
+
+        Returns:
+            list: One record per row, in input order
+        """
+        Xq = self.quantize(X)
+        keys = [(version, row.tobytes()) for row in Xq]
+        records = [self.cache.get(key) for key in keys]
+        misses = [i for i, record in enumerate(records) if record is None]
+
+        if misses:
+            for i, record in zip(misses, score_fn(X[misses])):
+                self.cache.set(keys[i], record)
+                records[i] = record
+        return records
+
+    def invalidate(self, previous=None, current=None):
+        """Drop every entry (registered as a model registry swap listener)"""
+        self.cache.clear()
+        self.invalidations += 1
+
+    def stats(self) -> dict:
+        """
+        Returns:
+            dict: TTLCache counters (including hit_ratio) plus swap invalidations
+        """
+        return {**self.cache.stats(), 'invalidations': self.invalidations}
+
+
+def create_prediction_cache():
+    """
+    Build the cache configured by the PREDICTION_CACHE_* environment variables
+
+    Returns:
+        PredictionCache, or None when caching is disabled
+    """
+    if PREDICTION_CACHE_SIZE <= 0:
+        return None
+    return PredictionCache(
+        maxsize=PREDICTION_CACHE_SIZE,
+        ttl=PREDICTION_CACHE_TTL_S,
+        max_bytes=int(PREDICTION_CACHE_MAX_MB * 1024 * 1024)
+    )
@@ -0,0 +1,269 @@
+"""
+FieldScore AI - Rolling Rainfall Deficit Engine
+Maintains the 30-day rainfall deficit of every cell of a precipitation grid
+(e.g. ERA5 at 0.25 deg) incrementally: each new day's grid is added to a
+per-cell running sum and the day leaving the window is subtracted
+
+State directory (memory-mapped, updated in place):
+    meta.json          grid transform, window length, ring position, last date
+    climatology.npy    (12, rows, cols) normal 30-day precipitation (mm) by month
+    ring.npy           (window, rows, cols) float32 daily grids in the window
+    sum.npy            (rows, cols) float64 running window total
+    deficit.npy        (rows, cols) float32 max(normal - total, 0), read by lookups
+    pending.npy        (rows, cols) the day being added, while an update runs
+
+An update journals its day (pending.npy, then "pending" in meta.json) before
+touching the arrays. If it is interrupted, the next writable open finishes it
+from the journal, recomputing the sum from the window instead of adding the
+day twice.
+
+Usage:
+    python rainfall_deficit.py init STATE_DIR climatology.npy --transform W N PIXEL_W PIXEL_H
+    python rainfall_deficit.py update STATE_DIR 2026-10-15 precip_20261015.npy
+    python rainfall_deficit.py lookup STATE_DIR -1.2921 36.8219
+    python rainfall_deficit.py rebuild STATE_DIR
+"""
+
+import argparse
+import json
+import os
+from datetime import date, timedelta
+
+import numpy as np
+
+WINDOW_DAYS = 30
+META_NAME = "meta.json"
+PENDING_NAME = "pending.npy"
+
+
+def write_meta(state_dir: str, meta: dict):
+    """Atomically replace the state metadata"""
+    path = os.path.join(state_dir, META_NAME)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+class RainfallDeficitEngine:
+    """
+    Array-backed rolling rainfall deficit over a north-up lat/lon grid
+
+    Open read-only (the default) for lookups, or with writable=True to apply
+    daily updates; a writable open first finishes an interrupted update.
+    Readers see updates written by another process; call refresh() (done
+    automatically by lookup) to pick up the new metadata.
+    """
+
+    def __init__(self, state_dir: str, writable: bool = False):
+        self.state_dir = state_dir
+        self.writable = writable
+        mode = "r+" if writable else "r"
+        self.climatology = np.load(self._path("climatology.npy"), mmap_mode="r")
+        self.ring = np.load(self._path("ring.npy"), mmap_mode=mode)
+        self.sum = np.load(self._path("sum.npy"), mmap_mode=mode)
+        self.deficit = np.load(self._path("deficit.npy"), mmap_mode=mode)
+        self._meta_mtime = None
+        self.refresh()
+        if writable and self.meta.get("pending") is not None:
+            self.rebuild()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.state_dir, name)
+
+    @classmethod
+    def create(cls, state_dir: str, climatology: np.ndarray, transform: tuple,
+               window_days: int = WINDOW_DAYS) -> "RainfallDeficitEngine":
+        """
+        Initialise an empty state directory
+
+        Args:
+            climatology: (12, rows, cols) normal window precipitation in mm, by the
+                month of the window's last day
+            transform: (west longitude, north latitude, pixel width deg, pixel height deg)
+        """
+        climatology = np.asarray(climatology, dtype=np.float32)
+        if climatology.ndim != 3 or climatology.shape[0] != 12:
+            raise ValueError(f"climatology must have shape (12, rows, cols), got {climatology.shape}")
+        shape = climatology.shape[1:]
+
+        os.makedirs(state_dir, exist_ok=True)
+        np.save(os.path.join(state_dir, "climatology.npy"), climatology)
+        for name, dtype, array_shape in (("ring.npy", np.float32, (window_days, *shape)),
+                                         ("sum.npy", np.float64, shape),
+                                         ("deficit.npy", np.float32, shape)):
+            array = np.lib.format.open_memmap(os.path.join(state_dir, name), mode="w+",
+                                              dtype=dtype, shape=array_shape)
+            array[...] = np.nan if name == "deficit.npy" else 0
+            array.flush()
+            del array
+
+        write_meta(state_dir, {
+            "transform": list(transform),
+            "shape": list(shape),
+            "window_days": window_days,
+            "head": 0,
+            "days": 0,
+            "last_date": None
+        })
+        return cls(state_dir, writable=True)
+
+    def refresh(self):
+        """Reload the metadata if another process updated it"""
+        mtime = os.stat(self._path(META_NAME)).st_mtime_ns
+        if mtime == self._meta_mtime:
+            return
+        with open(self._path(META_NAME)) as f:
+            self.meta = json.load(f)
+        self._meta_mtime = mtime
+
+    @property
+    def last_date(self):
+        value = self.meta["last_date"]
+        return date.fromisoformat(value) if value else None
+
+    @property
+    def ready(self) -> bool:
+        """True once a full window of days has been added"""
+        return self.meta["days"] >= self.meta["window_days"]
+
+    def update(self, day: date, precip) -> None:
+        """
+        Add one day's precipitation grid (mm) and drop the day leaving the window
+
+        Days must arrive in order without gaps. Cost is O(cells), independent
+        of the window length. NaN cells (missing data) count as 0 mm.
+        """
+        if not self.writable:
+            raise PermissionError("Engine was opened read-only")
+        last = self.last_date
+        if last is not None and day != last + timedelta(days=1):
+            raise ValueError(f"Expected data for {last + timedelta(days=1)}, got {day}")
+        precip = np.nan_to_num(np.asarray(precip, dtype=np.float32), nan=0.0)
+        if precip.shape != self.sum.shape:
+            raise ValueError(f"Grid has shape {precip.shape}, expected {self.sum.shape}")
+
+        head = self.meta["head"]
+        # Journal the day before the arrays change: their in-place update is not
+        # atomic, and replaying it onto a half-updated sum would count it twice
+        tmp_path = self._path(PENDING_NAME + ".tmp")
+        with open(tmp_path, "wb") as f:
+            np.save(f, precip)
+        os.replace(tmp_path, self._path(PENDING_NAME))
+        self.meta["pending"] = {"date": day.isoformat(), "head": head}
+        self._write_meta()
+
+        self.sum += precip
+        self.sum -= self.ring[head]
+        self.ring[head] = precip
+        np.maximum(self.climatology[day.month - 1] - self.sum, 0, out=self.deficit, casting="unsafe")
+        for array in (self.ring, self.sum, self.deficit):
+            array.flush()
+        self._commit(day)
+
+    def _commit(self, day: date):
+        # Advance the window past the journaled day and drop the journal
+        window_days = self.meta["window_days"]
+        self.meta.update(head=(self.meta["head"] + 1) % window_days,
+                         days=min(self.meta["days"] + 1, window_days),
+                         last_date=day.isoformat(), pending=None)
+        self._write_meta()
+        os.remove(self._path(PENDING_NAME))
+
+    def _write_meta(self):
+        write_meta(self.state_dir, self.meta)
+        self._meta_mtime = os.stat(self._path(META_NAME)).st_mtime_ns
+
+    def rebuild(self) -> None:
+        """
+        Recompute the running sum and deficit from the stored window
+
+        An update interrupted part-way is finished first: its journaled day is
+        written to the ring and the window advanced past it. Safe to rerun.
+        """
+        if not self.writable:
+            raise PermissionError("Engine was opened read-only")
+        pending = self.meta.get("pending")
+        if pending is not None:
+            self.ring[pending["head"]] = np.load(self._path(PENDING_NAME))
+            self.ring.flush()
+        day = date.fromisoformat(pending["date"]) if pending is not None else self.last_date
+        self.sum[...] = self.ring.sum(axis=0, dtype=np.float64)
+        if day is not None:
+            np.maximum(self.climatology[day.month - 1] - self.sum, 0, out=self.deficit, casting="unsafe")
+        for array in (self.sum, self.deficit):
+            array.flush()
+        if pending is not None:
+            self._commit(day)
+
+    def cells(self, latitudes, longitudes) -> tuple:
+        """
+        Grid (row, col) indices for coordinates; -1 where outside the grid
+        """
+        west, north, pixel_w, pixel_h = self.meta["transform"]
+        rows_n, cols_n = self.meta["shape"]
+        rows = np.floor((north - np.asarray(latitudes, dtype=np.float64)) / pixel_h).astype(np.int64)
+        cols = np.floor((np.asarray(longitudes, dtype=np.float64) - west) / pixel_w).astype(np.int64)
+        inside = (rows >= 0) & (rows < rows_n) & (cols >= 0) & (cols < cols_n)
+        return np.where(inside, rows, -1), np.where(inside, cols, -1)
+
+    def lookup(self, latitudes, longitudes) -> np.ndarray:
+        """
+        30-day rainfall deficit (mm) at each coordinate, one array read per farm
+
+        Returns:
+            np.ndarray: Deficits; NaN outside the grid or before a full window
+        """
+        self.refresh()
+        rows, cols = self.cells(latitudes, longitudes)
+        values = np.asarray(self.deficit[np.maximum(rows, 0), np.maximum(cols, 0)], dtype=np.float64)
+        values[rows < 0] = np.nan
+        if not self.ready:
+            values[:] = np.nan
+        return values
+
+    def deficit_at(self, latitude: float, longitude: float) -> float:
+        return float(self.lookup([latitude], [longitude])[0])
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rolling 30-day rainfall deficit over a precipitation grid")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    init_cmd = commands.add_parser("init", help="Create an empty state directory")
+    init_cmd.add_argument("state_dir")
+    init_cmd.add_argument("climatology", help=".npy of shape (12, rows, cols), normal window totals in mm")
+    init_cmd.add_argument("--transform", nargs=4, type=float, required=True,
+                          metavar=("WEST", "NORTH", "PIXEL_W", "PIXEL_H"))
+    init_cmd.add_argument("--window-days", type=int, default=WINDOW_DAYS)
+
+    update_cmd = commands.add_parser("update", help="Add one day's precipitation grid")
+    update_cmd.add_argument("state_dir")
+    update_cmd.add_argument("date", type=date.fromisoformat)
+    update_cmd.add_argument("precip", help=".npy of shape (rows, cols), daily precipitation in mm")
+
+    lookup_cmd = commands.add_parser("lookup", help="Print the deficit at a location")
+    lookup_cmd.add_argument("state_dir")
+    lookup_cmd.add_argument("latitude", type=float)
+    lookup_cmd.add_argument("longitude", type=float)
+
+    rebuild_cmd = commands.add_parser(
+        "rebuild", help="Recompute the running sum and deficits from the stored window")
+    rebuild_cmd.add_argument("state_dir")
+
+    args = parser.parse_args()
+    if args.command == "init":
+        RainfallDeficitEngine.create(args.state_dir, np.load(args.climatology), tuple(args.transform),
+                                     args.window_days)
+        print(f"✓ Initialised {args.state_dir}")
+    elif args.command == "update":
+        engine = RainfallDeficitEngine(args.state_dir, writable=True)
+        engine.update(args.date, np.load(args.precip, mmap_mode="r"))
+        print(f"✓ Added {args.date} ({engine.meta['days']}/{engine.meta['window_days']} days in window)")
+    elif args.command == "rebuild":
+        engine = RainfallDeficitEngine(args.state_dir, writable=True)
+        engine.rebuild()
+        print(f"✓ Rebuilt {args.state_dir} through {engine.last_date}")
+    else:
+        engine = RainfallDeficitEngine(args.state_dir)
+        print(engine.deficit_at(args.latitude, args.longitude))
@@ -0,0 +1,104 @@
+"""
+FieldScore AI - Prediction Response Encoding
+Fast JSON encoding of PredictionOutput-shaped records for the opt-in fast
+response path (FAST_RESPONSES=1 in api.py). The category payloads and feature
+labels come from the fixed tables in scoring.py and confidences have three
+decimals, so their JSON is rendered once and reused, and each record costs
+one string format. The output is byte for byte what FastAPI renders for the
+same records through response_model.
+"""
+
+import json
+
+from scoring import (
+    DROUGHT_LABELS,
+    NDVI_HEALTH_LABELS,
+    RISK_CATEGORIES,
+    STABILITY_LABELS,
+    TREND_LABELS,
+)
+
+
+def json_fragment(value) -> str:
+    """Compact JSON of a value, rendered as FastAPI's JSONResponse renders it"""
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+# The risk_category, category_class and recommendation members, per category name
+CATEGORY_FRAGMENTS = {
+    info['category']: (
+        f'"risk_category":{json_fragment(info["category"])},'
+        f'"category_class":{json_fragment(info["class"])},'
+        f'"recommendation":{json_fragment(info["recommendation"])}'
+    )
+    for info in RISK_CATEGORIES
+}
+
+# Quoted JSON string per feature interpretation label
+LABEL_FRAGMENTS = {
+    label: json_fragment(label)
+    for labels in (NDVI_HEALTH_LABELS, TREND_LABELS, DROUGHT_LABELS, STABILITY_LABELS)
+    for label in labels.tolist()
+}
+
+
+class FloatFragments(dict):
+    """
+    JSON of floats, rendered once per distinct value (as the json module
+    renders them, with repr)
+
+    Confidences are rounded to 3 decimals in [0, 1], so at most 1,001 values
+    are ever stored; past max_size new values are rendered but not stored.
+    """
+
+    def __init__(self, max_size: int = 1001):
+        super().__init__()
+        self.max_size = max_size
+
+    def __missing__(self, value: float) -> str:
+        fragment = repr(value)
+        if len(self) < self.max_size:
+            self[value] = fragment
+        return fragment
+
+
+CONFIDENCE_FRAGMENTS = FloatFragments()
+
+
+def encode_record(record: dict) -> str:
+    """
+    JSON of one PredictionOutput-shaped record, members in field order
+
+    The record must hold a Python int score and float confidence, and its
+    category and labels must come from the scoring tables (as the records of
+    score_farm and prediction_records do); anything else raises KeyError.
+    """
+    features = record['features']
+    return (
+        f'{{"risk_score":{record["risk_score"]},{CATEGORY_FRAGMENTS[record["risk_category"]]},'
+        f'"confidence":{CONFIDENCE_FRAGMENTS[record["confidence"]]},'
+        f'"features":{{"ndvi_health":{LABEL_FRAGMENTS[features["ndvi_health"]]},'
+        f'"trend":{LABEL_FRAGMENTS[features["trend"]]},'
+        f'"drought_status":{LABEL_FRAGMENTS[features["drought_status"]]},'
+        f'"stability":{LABEL_FRAGMENTS[features["stability"]]}}}}}'
+    )
+
+
+def encode_prediction(record: dict) -> bytes:
+    """
+    Response body of one prediction
+
+    Returns:
+        bytes: UTF-8 JSON object
+    """
+    return encode_record(record).encode()
+
+
+def encode_predictions(records: list) -> bytes:
+    """
+    Response body of a list of predictions, joined into one buffer
+
+    Returns:
+        bytes: UTF-8 JSON array, in record order
+    """
+    return ("[" + ",".join(map(encode_record, records)) + "]").encode()
@@ -0,0 +1,144 @@
+"""
+FieldScore AI - Streaming Portfolio Parsing
+Incremental NDJSON/CSV record parsing for the /predict/stream endpoint
+"""
+
+import csv
+import json
+from typing import AsyncIterator, Optional
+
+from starlette.responses import StreamingResponse
+
+# Content types accepted by /predict/stream, mapped to parser format
+STREAM_FORMATS = {
+    'application/x-ndjson': 'ndjson',
+    'application/ndjson': 'ndjson',
+    'application/jsonl': 'ndjson',
+    'application/json-lines': 'ndjson',
+    'text/csv': 'csv',
+    'application/csv': 'csv',
+}
+
+# A single record line longer than this aborts the stream instead of buffering
+MAX_LINE_BYTES = 1024 * 1024
+
+
+class StreamParseError(ValueError):
+    """Raised when the uploaded body cannot be parsed any further"""
+
+
+class BodyStreamingResponse(StreamingResponse):
+    """
+    StreamingResponse that can keep reading the request body while it streams
+
+    The stock class listens on receive() for client disconnects while sending,
+    which races with the body reader that produces the response rows.
+    """
+
+    async def __call__(self, scope, receive, send):
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+def stream_format(content_type: Optional[str]) -> Optional[str]:
+    """
+    Map a Content-Type header to a parser format
+
+    Returns:
+        str: 'ndjson' or 'csv', or None if the type is not supported
+    """
+    if not content_type:
+        return None
+    media_type = content_type.split(';', 1)[0].strip().lower()
+    return STREAM_FORMATS.get(media_type)
+
+
+async def iter_lines(chunks: AsyncIterator[bytes]) -> AsyncIterator[str]:
+    """
+    Split a byte stream into decoded lines without buffering the whole body
+    """
+    pending = b''
+    async for chunk in chunks:
+        if not chunk:
+            continue
+        pending += chunk
+        *lines, pending = pending.split(b'\n')
+        for line in lines:
+            yield line.rstrip(b'\r').decode('utf-8-sig')
+        if len(pending) > MAX_LINE_BYTES:
+            raise StreamParseError(f"Line exceeds {MAX_LINE_BYTES} bytes")
+    if pending.strip():
+        yield pending.rstrip(b'\r').decode('utf-8-sig')
+
+
+def parse_ndjson_lines(lines: list) -> list:
+    """
+    Parse NDJSON lines into records
+
+    Returns:
+        list: dict per line, or an error string for lines that are not objects
+    """
+    records = []
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError as e:
+            records.append(f"Invalid JSON: {e}")
+            continue
+        if not isinstance(record, dict):
+            records.append("Expected a JSON object per line")
+            continue
+        records.append(record)
+    return records
+
+
+def parse_csv_lines(lines: list, header: list) -> list:
+    """
+    Parse CSV data lines into records keyed by the header row
+
+    Returns:
+        list: dict per line, or an error string for malformed lines
+    """
+    records = []
+    for values in csv.reader(lines):
+        if len(values) != len(header):
+            records.append(f"Expected {len(header)} columns, got {len(values)}")
+            continue
+        records.append(dict(zip(header, values)))
+    return records
+
+
+async def iter_record_chunks(chunks: AsyncIterator[bytes], fmt: str,
+                             chunk_rows: int) -> AsyncIterator[list]:
+    """
+    Parse an uploaded NDJSON or CSV body into lists of at most chunk_rows records
+
+    CSV bodies use the column layout of data/training_data.csv; extra columns
+    such as loan_outcome are passed through and ignored by validation.
+
+    Yields:
+        list: Parsed records (dicts) or per-line error strings, in input order
+    """
+    header = None
+    lines = []
+
+    async for line in iter_lines(chunks):
+        if not line.strip():
+            continue
+        if fmt == 'csv' and header is None:
+            header = [name.strip() for name in next(csv.reader([line]))]
+            continue
+        lines.append(line)
+        if len(lines) >= chunk_rows:
+            yield parse_lines(lines, fmt, header)
+            lines = []
+
+    if lines:
+        yield parse_lines(lines, fmt, header)
+
+
+def parse_lines(lines: list, fmt: str, header: Optional[list]) -> list:
+    if fmt == 'csv':
+        return parse_csv_lines(lines, header)
+    return parse_ndjson_lines(lines)